@@ -1,16 +1,36 @@
 from flask import Flask
 from app.config import load_configurations, configure_logging
 from .views import webhook_blueprint
+from .services.media_service import MediaService
+from . import webhook_queue
+from .whatsapp_client import reset_settings_cache
+
+try:
+    from .utils.json_provider import OrjsonProvider
+except ImportError:
+    OrjsonProvider = None
 
 
 def create_app():
     app = Flask(__name__)
 
+    # Parse webhook payloads and render JSON responses with orjson when installed
+    if OrjsonProvider is not None:
+        app.json = OrjsonProvider(app)
+
     # Load configurations and logging settings
     load_configurations(app)
     configure_logging()
+    # load_dotenv may have changed the environment the client falls back to
+    reset_settings_cache()
 
     # Import and register blueprints, if any
     app.register_blueprint(webhook_blueprint)
 
+    # Precompute static sample media metadata once per process
+    MediaService.warm()
+
+    # Process message webhooks off the request thread
+    webhook_queue.init_app(app)
+
     return app
@@ -3,6 +3,8 @@ import os
 from dotenv import load_dotenv
 import logging
 
+from .whatsapp_payloads import media_upload_url, messages_url
+
 
 def load_configurations(app):
     load_dotenv()
@@ -14,6 +16,40 @@ def load_configurations(app):
     app.config["VERSION"] = os.getenv("VERSION")
     app.config["PHONE_NUMBER_ID"] = os.getenv("PHONE_NUMBER_ID")
     app.config["VERIFY_TOKEN"] = os.getenv("VERIFY_TOKEN")
+    configure_whatsapp_endpoints(app)
+
+
+def configure_whatsapp_endpoints(app):
+    """
+    Precompute the Graph API URLs and request headers from app config.
+    Call again after rotating ACCESS_TOKEN or changing VERSION/PHONE_NUMBER_ID.
+    """
+    app.config.update(build_whatsapp_endpoints(app.config))
+
+
+def build_whatsapp_endpoints(config):
+    """
+    Return the WHATSAPP_* URL and header entries for a mapping holding
+    VERSION, PHONE_NUMBER_ID and ACCESS_TOKEN.
+    """
+    graph_url = f"https://graph.facebook.com/{config['VERSION']}"
+    authorization = f"Bearer {config['ACCESS_TOKEN']}"
+
+    return {
+        "WHATSAPP_GRAPH_URL": graph_url,
+        "WHATSAPP_MESSAGES_URL": messages_url(graph_url, config["PHONE_NUMBER_ID"]),
+        "WHATSAPP_MEDIA_URL": media_upload_url(graph_url, config["PHONE_NUMBER_ID"]),
+        "WHATSAPP_HEADERS": {
+            "Content-type": "application/json",
+            "Authorization": authorization,
+        },
+        "WHATSAPP_AUTH_HEADERS": {"Authorization": authorization},
+        # Media is already compressed; asking for identity skips a decode pass
+        "WHATSAPP_DOWNLOAD_HEADERS": {
+            "Authorization": authorization,
+            "Accept-Encoding": "identity",
+        },
+    }
 
 
 def configure_logging():
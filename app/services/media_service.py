@@ -1,8 +1,48 @@
+import functools
 import logging
 import os
-from typing import Optional, Dict, Any
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from types import MappingProxyType
+from typing import Optional, Dict, Any, Mapping, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from ..utils.http_client import SSLContextAdapter, public_ssl_context
 from ..whatsapp_client import WhatsAppClient
 
+# Cached URL accessibility checks: media_url -> (checked_at, accessible)
+_URL_CHECK_CACHE: Dict[str, Tuple[float, bool]] = {}
+_URL_CHECK_TTL = 300.0
+
+# Uploaded sample file media IDs: media_type -> (uploaded_at, media_id).
+# WhatsApp keeps uploaded media for 30 days, so IDs are reused for a bit less.
+_UPLOADED_IDS: Dict[str, Tuple[float, str]] = {}
+_UPLOADED_ID_TTL = 29 * 24 * 3600.0
+_UPLOAD_LOCK = threading.Lock()
+
+# Shared keep-alive session for sample URL checks, created on first use
+_SESSION = None
+_SESSION_LOCK = threading.Lock()
+
+
+def _get_session():
+    """Return the pooled session used for sample media URL checks."""
+    global _SESSION
+    if _SESSION is None:
+        with _SESSION_LOCK:
+            if _SESSION is None:
+                session = requests.Session()
+                session.mount("http://", HTTPAdapter(pool_connections=8, pool_maxsize=8))
+                session.mount(
+                    "https://",
+                    SSLContextAdapter(public_ssl_context, pool_connections=8, pool_maxsize=8),
+                )
+                _SESSION = session
+    return _SESSION
+
 
 class MediaService:
     """
@@ -35,14 +75,35 @@ class MediaService:
         }
     }
     
+    # Bundled local copies of the samples, sent via upload + media ID
+    _FILE_SAMPLES = {
+        "image": "data/media/1497313627961580_image.jpg",
+        "video": "data/media/2255528285309786_video.mp4",
+        "audio": "data/media/story.mp3",
+        "document": "data/airbnb-faq.pdf",
+    }
+    
+    # Read-only per-type views of SAMPLE_MEDIA_FILES used to build info dicts
+    _TEMPLATES = {
+        media_type: MappingProxyType(config)
+        for media_type, config in SAMPLE_MEDIA_FILES.items()
+    }
+    
+    # Optional send kwargs (caption, filename) resolved once per media type
+    _SEND_KWARGS = {
+        media_type: {key: config[key] for key in ("caption", "filename") if config.get(key)}
+        for media_type, config in SAMPLE_MEDIA_FILES.items()
+    }
+    
     @staticmethod
-    def send_sample_media(media_type: str, recipient: str) -> Dict[str, Any]:
+    def send_sample_media(media_type: str, recipient: str, caption: Optional[str] = None) -> Dict[str, Any]:
         """
         Send a sample media file to the specified recipient using public URLs.
         
         Args:
             media_type: Type of media to send ('image', 'video', 'audio', 'document')
             recipient: WhatsApp ID of the recipient
+            caption: Optional caption replacing the sample's own (ignored for audio)
             
         Returns:
             Dictionary with success status and details
@@ -51,15 +112,12 @@ class MediaService:
             if media_type not in MediaService.SAMPLE_MEDIA_FILES:
                 raise ValueError(f"Unsupported media type: {media_type}")
             
-            media_config = MediaService.SAMPLE_MEDIA_FILES[media_type]
-            media_url = media_config["url"]
+            media_url = MediaService.SAMPLE_MEDIA_FILES[media_type]["url"]
             
             logging.info(f"Sending sample {media_type} from URL: {media_url}")
             
             # Send the media directly using URL
-            response = MediaService._send_media_by_url(
-                media_type, recipient, media_url, media_config
-            )
+            response = MediaService._send_media_by_url(media_type, recipient, media_url, caption)
             
             logging.info(f"Successfully sent sample {media_type} to {recipient}")
             
@@ -79,7 +137,151 @@ class MediaService:
             }
     
     @staticmethod
-    def _send_media_by_url(media_type: str, recipient: str, media_url: str, config: Dict[str, Any]) -> Dict[str, Any]:
+    def send_sample_media_from_file(media_type: str, recipient: str) -> Dict[str, Any]:
+        """
+        Send a bundled local sample file by uploading it to WhatsApp first.
+        
+        Args:
+            media_type: Type of media to send ('image', 'video', 'audio', 'document')
+            recipient: WhatsApp ID of the recipient
+            
+        Returns:
+            Dictionary with success status and details
+        """
+        try:
+            if media_type not in MediaService._FILE_SAMPLES:
+                raise ValueError(f"Unsupported media type: {media_type}")
+            
+            media_id = MediaService._get_sample_media_id(media_type)
+            try:
+                response = MediaService._send_media_by_type(media_type, recipient, media_id)
+            except Exception:
+                # The cached ID may have expired on WhatsApp's side; upload afresh next time
+                _UPLOADED_IDS.pop(media_type, None)
+                raise
+            
+            logging.info(f"Successfully sent sample {media_type} file to {recipient}")
+            
+            return {
+                "success": True,
+                "media_type": media_type,
+                "media_id": media_id,
+                "response": response
+            }
+            
+        except Exception as e:
+            logging.error(f"Failed to send sample {media_type} file: {e}")
+            return {
+                "success": False,
+                "error": str(e),
+                "media_type": media_type
+            }
+    
+    @staticmethod
+    def _get_sample_media_id(media_type: str) -> str:
+        """
+        Return the WhatsApp media ID of a bundled sample file, uploading it at most once per TTL.
+        
+        Args:
+            media_type: Type of media ('image', 'video', 'audio', 'document')
+            
+        Returns:
+            Media ID usable with the send_* methods
+        """
+        cached = _UPLOADED_IDS.get(media_type)
+        if cached is not None and time.monotonic() - cached[0] < _UPLOADED_ID_TTL:
+            return cached[1]
+        
+        with _UPLOAD_LOCK:
+            # Another thread may have uploaded while we waited for the lock
+            cached = _UPLOADED_IDS.get(media_type)
+            if cached is not None and time.monotonic() - cached[0] < _UPLOADED_ID_TTL:
+                return cached[1]
+            
+            file_path = MediaService._FILE_SAMPLES[media_type]
+            
+            logging.info(f"Uploading sample {media_type} from file: {file_path}")
+            
+            # No existence pre-check: a missing file surfaces as FileNotFoundError;
+            # the MIME type comes from the extension
+            media_id = WhatsAppClient.upload_media(file_path)
+            _UPLOADED_IDS[media_type] = (time.monotonic(), media_id)
+            return media_id
+    
+    @staticmethod
+    def preupload_sample_media() -> Dict[str, bool]:
+        """
+        Upload every bundled sample file now so the first send doesn't pay for it.
+        
+        Returns:
+            Dictionary mapping media types to whether their upload succeeded
+        """
+        results = {}
+        for media_type in MediaService._FILE_SAMPLES:
+            try:
+                MediaService._get_sample_media_id(media_type)
+                results[media_type] = True
+            except Exception as e:
+                logging.warning(f"Failed to pre-upload sample {media_type}: {e}")
+                results[media_type] = False
+        return results
+    
+    @staticmethod
+    def invalidate_uploaded_media_ids() -> None:
+        """Forget uploaded sample media IDs so the next send uploads the files again."""
+        _UPLOADED_IDS.clear()
+    
+    # media_type -> (send method, media reference kwarg)
+    _URL_DISPATCH = {
+        "image": (WhatsAppClient.send_image, "image_url"),
+        "video": (WhatsAppClient.send_video, "video_url"),
+        "audio": (WhatsAppClient.send_audio, "audio_url"),
+        "document": (WhatsAppClient.send_document, "document_url"),
+    }
+    
+    _ID_DISPATCH = {
+        "image": (WhatsAppClient.send_image, "image_id"),
+        "video": (WhatsAppClient.send_video, "video_id"),
+        "audio": (WhatsAppClient.send_audio, "audio_id"),
+        "document": (WhatsAppClient.send_document, "document_id"),
+    }
+    
+    @staticmethod
+    def _dispatch(
+        table: Dict[str, tuple],
+        media_type: str,
+        recipient: str,
+        media_ref: str,
+        caption: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """
+        Call the WhatsAppClient send method registered for media_type in table.
+        
+        Args:
+            table: One of _URL_DISPATCH or _ID_DISPATCH
+            media_type: Type of media ('image', 'video', 'audio', 'document')
+            recipient: WhatsApp ID of the recipient
+            media_ref: Public URL or uploaded media ID, depending on table
+            caption: Optional caption overriding the sample's, for types that take one
+            
+        Returns:
+            API response from WhatsApp
+        """
+        try:
+            send, ref_kwarg = table[media_type]
+        except KeyError:
+            raise ValueError(f"Unsupported media type: {media_type}")
+        
+        send_kwargs = MediaService._SEND_KWARGS[media_type]
+        if caption and "caption" in send_kwargs:
+            send_kwargs = {**send_kwargs, "caption": caption}
+        
+        return send(to=recipient, **{ref_kwarg: media_ref}, **send_kwargs)
+    
+    @staticmethod
+    def _send_media_by_url(
+        media_type: str, recipient: str, media_url: str, caption: Optional[str] = None
+    ) -> Dict[str, Any]:
         """
         Send media using public URLs with the appropriate WhatsAppClient method.
         
@@ -87,44 +289,17 @@ class MediaService:
             media_type: Type of media ('image', 'video', 'audio', 'document')
             recipient: WhatsApp ID of the recipient
             media_url: Public URL of the media file
-            config: Media configuration dictionary
+            caption: Optional caption overriding the sample's
             
         Returns:
             API response from WhatsApp
         """
-        if media_type == "image":
-            return WhatsAppClient.send_image(
-                to=recipient,
-                image_url=media_url,
-                caption=config.get("caption", "")
-            )
-        
-        elif media_type == "video":
-            return WhatsAppClient.send_video(
-                to=recipient,
-                video_url=media_url,
-                caption=config.get("caption", "")
-            )
-        
-        elif media_type == "audio":
-            return WhatsAppClient.send_audio(
-                to=recipient,
-                audio_url=media_url
-            )
-        
-        elif media_type == "document":
-            return WhatsAppClient.send_document(
-                to=recipient,
-                document_url=media_url,
-                filename=config.get("filename"),
-                caption=config.get("caption", "")
-            )
-        
-        else:
-            raise ValueError(f"Unsupported media type: {media_type}")
+        return MediaService._dispatch(
+            MediaService._URL_DISPATCH, media_type, recipient, media_url, caption
+        )
     
     @staticmethod
-    def _send_media_by_type(media_type: str, recipient: str, media_id: str, config: Dict[str, Any]) -> Dict[str, Any]:
+    def _send_media_by_type(media_type: str, recipient: str, media_id: str) -> Dict[str, Any]:
         """
         Send media using the appropriate WhatsAppClient method based on media type.
         (Legacy method for uploaded media IDs)
@@ -133,41 +308,13 @@ class MediaService:
             media_type: Type of media ('image', 'video', 'audio', 'document')
             recipient: WhatsApp ID of the recipient
             media_id: Media ID from WhatsApp upload
-            config: Media configuration dictionary
             
         Returns:
             API response from WhatsApp
         """
-        if media_type == "image":
-            return WhatsAppClient.send_image(
-                to=recipient,
-                image_id=media_id,
-                caption=config.get("caption", "")
-            )
-        
-        elif media_type == "video":
-            return WhatsAppClient.send_video(
-                to=recipient,
-                video_id=media_id,
-                caption=config.get("caption", "")
-            )
-        
-        elif media_type == "audio":
-            return WhatsAppClient.send_audio(
-                to=recipient,
-                audio_id=media_id
-            )
-        
-        elif media_type == "document":
-            return WhatsAppClient.send_document(
-                to=recipient,
-                document_id=media_id,
-                filename=config.get("filename"),
-                caption=config.get("caption", "")
-            )
-        
-        else:
-            raise ValueError(f"Unsupported media type: {media_type}")
+        return MediaService._dispatch(
+            MediaService._ID_DISPATCH, media_type, recipient, media_id
+        )
     
     @staticmethod
     def get_sample_media_info(media_type: str) -> Optional[Dict[str, Any]]:
@@ -180,17 +327,12 @@ class MediaService:
         Returns:
             Dictionary with media URL information or None if not found
         """
-        if media_type not in MediaService.SAMPLE_MEDIA_FILES:
+        template = MediaService._TEMPLATES.get(media_type)
+        if template is None:
             return None
         
-        config = MediaService.SAMPLE_MEDIA_FILES[media_type].copy()
-        media_url = config["url"]
-        
         # For URLs, we assume they're accessible (no local file check needed)
-        config["accessible"] = True
-        config["source"] = "public_url"
-        
-        return config
+        return {**template, "accessible": True, "source": "public_url"}
     
     @staticmethod
     def list_available_sample_media() -> Dict[str, Dict[str, Any]]:
@@ -200,6 +342,12 @@ class MediaService:
         Returns:
             Dictionary mapping media types to their information
         """
+        return dict(MediaService._available_snapshot())
+    
+    @staticmethod
+    @functools.lru_cache(maxsize=1)
+    def _available_snapshot() -> Mapping[str, Dict[str, Any]]:
+        """Build the available sample media mapping once and keep it read-only."""
         available_media = {}
         
         for media_type in MediaService.SAMPLE_MEDIA_FILES:
@@ -207,7 +355,18 @@ class MediaService:
             if info and info.get("accessible", False):
                 available_media[media_type] = info
         
-        return available_media
+        return MappingProxyType(available_media)
+    
+    @staticmethod
+    def invalidate() -> None:
+        """Drop the cached sample media listing, e.g. after SAMPLE_MEDIA_FILES changes."""
+        MediaService._available_snapshot.cache_clear()
+    
+    @staticmethod
+    def warm() -> None:
+        """Build the cached sample media listing up front, e.g. during app startup."""
+        MediaService.invalidate()
+        MediaService._available_snapshot()
     
     @staticmethod
     def validate_sample_media_urls() -> Dict[str, bool]:
@@ -217,26 +376,56 @@ class MediaService:
         Returns:
             Dictionary mapping media types to their accessibility status
         """
-        import requests
-        validation_results = {}
+        samples = MediaService.SAMPLE_MEDIA_FILES
         
-        for media_type, config in MediaService.SAMPLE_MEDIA_FILES.items():
-            media_url = config["url"]
+        # Check all URLs concurrently so validation takes max(latency), not sum
+        with ThreadPoolExecutor(max_workers=len(samples)) as executor:
+            futures = {
+                media_type: executor.submit(
+                    MediaService._check_url_accessible, media_type, config["url"]
+                )
+                for media_type, config in samples.items()
+            }
+        
+        return {media_type: future.result() for media_type, future in futures.items()}
+    
+    @staticmethod
+    def _check_url_accessible(media_type: str, media_url: str) -> bool:
+        """
+        Check whether a sample media URL is accessible, reusing a recent result.
+        
+        Args:
+            media_type: Type of media the URL belongs to (used for logging)
+            media_url: Public URL of the media file
             
-            try:
-                # Make a HEAD request to check if URL is accessible
-                response = requests.head(media_url, timeout=10, allow_redirects=True)
-                if response.status_code == 200:
-                    validation_results[media_type] = True
-                    logging.info(f"Sample {media_type} URL is accessible: {media_url}")
-                else:
-                    validation_results[media_type] = False
-                    logging.warning(f"Sample {media_type} URL returned {response.status_code}: {media_url}")
-            except Exception as e:
-                logging.warning(f"Sample {media_type} URL not accessible: {e}")
-                validation_results[media_type] = False
+        Returns:
+            True if the URL answered a HEAD request with 200
+        """
+        now = time.monotonic()
+        cached = _URL_CHECK_CACHE.get(media_url)
+        if cached is not None and now - cached[0] < _URL_CHECK_TTL:
+            return cached[1]
+        
+        try:
+            # Make a HEAD request to check if URL is accessible
+            response = _get_session().head(media_url, timeout=10, allow_redirects=True)
+            if response.status_code == 200:
+                accessible = True
+                logging.info(f"Sample {media_type} URL is accessible: {media_url}")
+            else:
+                accessible = False
+                logging.warning(f"Sample {media_type} URL returned {response.status_code}: {media_url}")
+        except Exception as e:
+            logging.warning(f"Sample {media_type} URL not accessible: {e}")
+            accessible = False
         
-        return validation_results
+        _URL_CHECK_CACHE[media_url] = (now, accessible)
+        return accessible
+    
+    @staticmethod
+    def invalidate_url_check_cache() -> None:
+        """Forget cached URL accessibility results so the next validation re-checks."""
+        _URL_CHECK_CACHE.clear()
     
     @staticmethod
     def validate_sample_media_files() -> Dict[str, bool]:
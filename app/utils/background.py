@@ -0,0 +1,60 @@
+import logging
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import lru_cache
+
+from flask import current_app, has_app_context
+
+logger = logging.getLogger(__name__)
+
+# Pool for side effects whose result nobody reads (read receipts, courtesy messages)
+_FIRE_AND_FORGET = ThreadPoolExecutor(max_workers=32, thread_name_prefix="fnf")
+
+
+@lru_cache(maxsize=1)
+def graph_slots() -> threading.BoundedSemaphore:
+    """
+    Semaphore capping concurrent background Graph API work across worker pools.
+
+    Sized from GRAPH_MAX_CONCURRENCY (default 32); built on first use so a
+    value from .env is already loaded.
+    """
+    return threading.BoundedSemaphore(int(os.getenv("GRAPH_MAX_CONCURRENCY", "32")))
+
+
+def available_graph_slots() -> int:
+    """Number of background Graph calls that could start right now."""
+    return graph_slots()._value
+
+
+def submit(executor: ThreadPoolExecutor, fn, *args, **kwargs) -> Future:
+    """
+    Run fn(*args, **kwargs) on executor while holding one of graph_slots().
+
+    The caller's app context, if any, is pushed in the worker so Graph API
+    helpers can read current_app.config. Exceptions are logged, not raised.
+    """
+    app = current_app._get_current_object() if has_app_context() else None
+    future = executor.submit(_run, app, fn, args, kwargs)
+    future.add_done_callback(_log_failure)
+    return future
+
+
+def fire_and_forget(fn, *args, **kwargs) -> Future:
+    """Run fn(*args, **kwargs) on the shared side-effect pool without waiting for it."""
+    return submit(_FIRE_AND_FORGET, fn, *args, **kwargs)
+
+
+def _run(app, fn, args, kwargs):
+    with graph_slots():
+        if app is None:
+            return fn(*args, **kwargs)
+        with app.app_context():
+            return fn(*args, **kwargs)
+
+
+def _log_failure(future: Future) -> None:
+    exc = future.exception()
+    if exc is not None:
+        logger.warning("Background task failed", exc_info=exc)
@@ -0,0 +1,62 @@
+import ssl
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.utils import DEFAULT_CA_BUNDLE_PATH
+from urllib3.util.retry import Retry
+
+
+def _build_ssl_context(minimum_version: ssl.TLSVersion = ssl.TLSVersion.TLSv1_2) -> ssl.SSLContext:
+    """Client context with the CA bundle loaded once up front."""
+    ctx = ssl.create_default_context(cafile=DEFAULT_CA_BUNDLE_PATH)
+    ctx.minimum_version = minimum_version
+    # Every session here is requests/urllib3, which only speaks HTTP/1.1
+    ctx.set_alpn_protocols(["http/1.1"])
+    return ctx
+
+
+# Graph and its media CDN both speak TLS 1.3, so every handshake is 1-RTT
+graph_ssl_context = _build_ssl_context(ssl.TLSVersion.TLSv1_3)
+# For arbitrary public hosts (sample media URLs), which may still be on TLS 1.2
+public_ssl_context = _build_ssl_context()
+
+
+class SSLContextAdapter(HTTPAdapter):
+    """HTTPAdapter whose pools all share one pre-built SSL context."""
+
+    def __init__(self, ssl_context: ssl.SSLContext, *args, **kwargs):
+        self._ssl_context = ssl_context
+        super().__init__(*args, **kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        kwargs["ssl_context"] = self._ssl_context
+        return super().init_poolmanager(*args, **kwargs)
+
+    def proxy_manager_for(self, *args, **kwargs):
+        kwargs["ssl_context"] = self._ssl_context
+        return super().proxy_manager_for(*args, **kwargs)
+
+
+def _build_graph_session() -> requests.Session:
+    """Create the keep-alive session used for all WhatsApp Graph API traffic."""
+    session = requests.Session()
+    session.mount(
+        "https://",
+        SSLContextAdapter(
+            graph_ssl_context,
+            pool_connections=20,
+            pool_maxsize=50,
+            # Status retries only apply to idempotent methods, so sends are never duplicated
+            max_retries=Retry(
+                total=2,
+                backoff_factor=0.2,
+                status_forcelist=[429, 500, 502, 503, 504],
+                raise_on_status=False,
+            ),
+        ),
+    )
+    return session
+
+
+# Shared by every Graph API call site so TLS connections are reused across them
+graph_session = _build_graph_session()
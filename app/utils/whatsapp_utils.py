@@ -1,30 +1,77 @@
+import functools
 import logging
 from flask import current_app, jsonify
 import json
 import requests
 import os
+from concurrent.futures import ThreadPoolExecutor
+from types import MappingProxyType
 from typing import Dict, Any, Optional, Tuple
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+from .http_client import graph_session
+from .background import fire_and_forget, graph_slots
+from ..whatsapp_payloads import read_receipt_body
+
 # from app.services.openai_service import generate_response
 import re
 
+# Prefer RE2 (google-re2) when installed: linear-time matching, no backtracking
+try:
+    import re2 as _regex
+except ImportError:
+    _regex = re
+
+# Assistant citation markers, e.g. 【4:0†source】
+_BRACKET_RE = _regex.compile(r"【.*?】")
+# Markdown bold (**text**), rewritten to WhatsApp bold (*text*)
+_BOLD_RE = _regex.compile(r"\*\*(.*?)\*\*")
+
+# Shared read-only default for optional payload sections
+_EMPTY = MappingProxyType({})
+
+# Message types that carry downloadable media
+_MEDIA_TYPES = frozenset(("image", "audio", "video", "document"))
+
+# Media download + ack run here so the webhook can return 200 before Meta retries
+_EXECUTOR = ThreadPoolExecutor(max_workers=8, thread_name_prefix="wa-media")
 
 
 def log_http_response(response):
-    logging.info(f"Status: {response.status_code}")
-    logging.info(f"Content-type: {response.headers.get('content-type')}")
-    logging.info(f"Body: {response.text}")
+    # Skip decoding the body entirely when INFO records would be dropped
+    if not logging.getLogger().isEnabledFor(logging.INFO):
+        return
+    logging.info("Status: %s", response.status_code)
+    logging.info("Content-type: %s", response.headers.get("content-type"))
+    logging.info("Body: %s", response.text)
 
 
 def get_text_message_input(recipient, text):
-    return json.dumps(
-        {
-            "messaging_product": "whatsapp",
-            "recipient_type": "individual",
-            "to": recipient,
-            "type": "text",
-            "text": {"preview_url": False, "body": text},
-        }
+    if orjson is not None:
+        # orjson encodes straight to UTF-8 bytes, which requests sends as-is
+        return orjson.dumps(
+            {
+                "messaging_product": "whatsapp",
+                "recipient_type": "individual",
+                "to": recipient,
+                "type": "text",
+                "text": {"preview_url": False, "body": text},
+            }
+        )
+
+    # Only the recipient and body vary, so splice them into a fixed envelope.
+    # json.dumps keeps its default ensure_ascii so the body stays latin-1 safe
+    # when requests sends it as a str.
+    return (
+        '{"messaging_product": "whatsapp", "recipient_type": "individual", "to": '
+        + json.dumps(recipient)
+        + ', "type": "text", "text": {"preview_url": false, "body": '
+        + json.dumps(text)
+        + "}}"
     )
 
 
@@ -34,24 +81,21 @@ def generate_response(response):
 
 
 def send_message(data):
-    headers = {
-        "Content-type": "application/json",
-        "Authorization": f"Bearer {current_app.config['ACCESS_TOKEN']}",
-    }
-
-    url = f"https://graph.facebook.com/{current_app.config['VERSION']}/{current_app.config['PHONE_NUMBER_ID']}/messages"
+    config = current_app.config
 
     try:
-        response = requests.post(
-            url, data=data, headers=headers, timeout=10
+        response = graph_session.post(
+            config["WHATSAPP_MESSAGES_URL"],
+            data=data,
+            headers=config["WHATSAPP_HEADERS"],
+            timeout=10,
         )  # 10 seconds timeout as an example
-        response.raise_for_status()  # Raises an HTTPError if the HTTP request returned an unsuccessful status code
-    except requests.Timeout:
-        logging.error("Timeout occurred while sending message")
-        return jsonify({"status": "error", "message": "Request timed out"}), 408
-    except (
-        requests.RequestException
-    ) as e:  # This will catch any general request exception
+        if response.status_code >= 400:
+            raise requests.HTTPError(f"{response.status_code} {response.reason}", response=response)
+    except requests.RequestException as e:  # Timeout is a subclass
+        if isinstance(e, requests.Timeout):
+            logging.error("Timeout occurred while sending message")
+            return jsonify({"status": "error", "message": "Request timed out"}), 408
         logging.error(f"Request failed due to: {e}")
         return jsonify({"status": "error", "message": "Failed to send message"}), 500
     else:
@@ -61,35 +105,26 @@ def send_message(data):
 
 
 def process_text_for_whatsapp(text):
-    # Remove brackets
-    pattern = r"\【.*?\】"
-    # Substitute the pattern with an empty string
-    text = re.sub(pattern, "", text).strip()
-
-    # Pattern to find double asterisks including the word(s) in between
-    pattern = r"\*\*(.*?)\*\*"
+    # Remove brackets (a substring test is far cheaper than running the regex)
+    if "【" in text:
+        text = _BRACKET_RE.sub("", text)
+    text = text.strip()
 
-    # Replacement pattern with single asterisks
-    replacement = r"*\1*"
-
-    # Substitute occurrences of the pattern with the replacement
-    whatsapp_style_text = re.sub(pattern, replacement, text)
-
-    return whatsapp_style_text
+    # Replace double asterisks with single asterisks
+    return _BOLD_RE.sub(r"*\1*", text)
 
 
 def process_whatsapp_message(body):
-    wa_id = body["entry"][0]["changes"][0]["value"]["contacts"][0]["wa_id"]
-    name = body["entry"][0]["changes"][0]["value"]["contacts"][0]["profile"]["name"]
+    value = get_webhook_value(body)
+    contact = value["contacts"][0]
+    wa_id = contact["wa_id"]
+    name = contact["profile"]["name"]
 
-    message = body["entry"][0]["changes"][0]["value"]["messages"][0]
+    message = value["messages"][0]
     message_type = message.get("type", "text")
 
-    # Always mark inbound messages as read for better UX
-    try:
-        mark_as_read(message.get("id"))
-    except Exception as e:
-        logging.warning(f"Failed to mark message as read: {e}")
+    # Always mark inbound messages as read for better UX; nothing waits on the receipt
+    fire_and_forget(mark_as_read, message.get("id"))
 
     if message_type == "text":
         message_body = message["text"]["body"]
@@ -104,22 +139,44 @@ def process_whatsapp_message(body):
         return
 
     # Media handling: image, audio, video, document
-    if message_type in {"image", "audio", "video", "document"}:
+    if message_type in _MEDIA_TYPES:
         media_info = message.get(message_type, {})
-        media_id = media_info.get("id")
-        caption = media_info.get("caption", "")
+        _EXECUTOR.submit(
+            _handle_media_async,
+            current_app._get_current_object(),
+            wa_id,
+            message_type,
+            media_info.get("id"),
+            media_info.get("caption", ""),
+        )
+        return
+
+    # Fallback for unsupported types
+    logging.info(f"Received unsupported message type: {message_type}")
+    try:
+        send_text_message(wa_id, f"Unsupported message type: {message_type}")
+    except Exception as e:
+        logging.error(f"Failed to send unsupported type notice: {e}")
+
 
+def _handle_media_async(app, wa_id: str, message_type: str, media_id: Optional[str], caption: str):
+    """Download incoming media and acknowledge it; runs on _EXECUTOR."""
+    with graph_slots(), app.app_context():
         try:
             if not media_id:
                 raise ValueError("Missing media id in incoming message")
             media_url = MediaHandler._get_media_url(media_id)
-            media_bytes = MediaHandler._download_media_content(media_url)
+            media_size = MediaHandler._download_media_size(media_url)
+            # The CDN URL is long and signed, so it stays out of the log
             logging.info(
-                f"Received {message_type} from {wa_id}: id={media_id}, url={media_url}, size={len(media_bytes)} bytes"
+                "Received %s from %s: id=%s, size=%d bytes", message_type, wa_id, media_id, media_size
             )
         except Exception as e:
             logging.error(f"Failed to fetch incoming media: {e}")
-            send_text_message(wa_id, "Sorry, I couldn't fetch your media.")
+            try:
+                send_text_message(wa_id, "Sorry, I couldn't fetch your media.")
+            except Exception as e:
+                logging.error(f"Failed to send media failure notice: {e}")
             return
 
         # Simple acknowledgment reply (echo caption if present)
@@ -128,14 +185,6 @@ def process_whatsapp_message(body):
             send_text_message(wa_id, ack)
         except Exception as e:
             logging.error(f"Failed to send ack for media: {e}")
-        return
-
-    # Fallback for unsupported types
-    logging.info(f"Received unsupported message type: {message_type}")
-    try:
-        send_text_message(wa_id, f"Unsupported message type: {message_type}")
-    except Exception as e:
-        logging.error(f"Failed to send unsupported type notice: {e}")
 
 
 def send_text_message(recipient: str, text: str):
@@ -144,24 +193,38 @@ def send_text_message(recipient: str, text: str):
     return send_message(data)
 
 
+# Stands in for the recipient in prebuilt bodies; "to" precedes the text, so
+# the first quoted occurrence is always the recipient slot
+_RECIPIENT_SLOT = b'"__TO__"'
+
+
+def prebuild_text_message(text: str) -> bytes:
+    """Serialize a fixed reply once; send it with send_prebuilt_text_message."""
+    data = get_text_message_input("__TO__", text)
+    return data if isinstance(data, bytes) else data.encode()
+
+
+def send_prebuilt_text_message(recipient: str, body: bytes):
+    """Send a body from prebuild_text_message to a WhatsApp user."""
+    return send_message(body.replace(_RECIPIENT_SLOT, json.dumps(recipient).encode(), 1))
+
+
 def mark_as_read(message_id: str):
     """Mark a message as read."""
-    headers = {
-        "Content-type": "application/json",
-        "Authorization": f"Bearer {current_app.config['ACCESS_TOKEN']}",
-    }
-    
-    url = f"https://graph.facebook.com/{current_app.config['VERSION']}/{current_app.config['PHONE_NUMBER_ID']}/messages"
-    
-    data = json.dumps({
-        "messaging_product": "whatsapp",
-        "status": "read",
-        "message_id": message_id,
-    })
-    
+    config = current_app.config
+
+    # Only message_id varies, so it is spliced into a fixed body
+    data = read_receipt_body(message_id)
+
     try:
-        response = requests.post(url, data=data, headers=headers, timeout=10)
-        response.raise_for_status()
+        response = graph_session.post(
+            config["WHATSAPP_MESSAGES_URL"],
+            data=data,
+            headers=config["WHATSAPP_HEADERS"],
+            timeout=10,
+        )
+        if response.status_code >= 400:
+            raise requests.HTTPError(f"{response.status_code} {response.reason}", response=response)
         return response
     except requests.RequestException as e:
         logging.error(f"Failed to mark message as read: {e}")
@@ -196,6 +259,14 @@ class MediaHandler:
         'text/plain': '.txt',
     }
     
+    # Extension to use when the MIME type is missing or unknown
+    _FALLBACK_EXT = {
+        "image": ".jpg",
+        "audio": ".mp3",
+        "video": ".mp4",
+        "document": ".pdf",
+    }
+    
     @staticmethod
     def extract_media_info(message: Dict[str, Any]) -> Optional[Dict[str, Any]]:
         """
@@ -209,7 +280,7 @@ class MediaHandler:
         """
         message_type = message.get("type")
         
-        if message_type not in {"image", "audio", "video", "document"}:
+        if message_type not in _MEDIA_TYPES:
             return None
             
         media_data = message.get(message_type, {})
@@ -225,45 +296,39 @@ class MediaHandler:
         }
     
     @staticmethod
-    def process_incoming_media(media_info: Dict[str, Any], save_directory: str = "data/media") -> Tuple[str, bytes]:
+    def process_incoming_media(media_info: Dict[str, Any], save_directory: str = "data/media") -> Tuple[str, int]:
         """
         Download and save incoming media from WhatsApp.
         
+        The media body is streamed straight to disk, so it is never held in memory.
+        
         Args:
             media_info: Media information dictionary from extract_media_info
             save_directory: Directory to save the media files
             
         Returns:
-            Tuple of (file_path, media_bytes)
+            Tuple of (file_path, size_in_bytes)
         """
         if not media_info or not media_info.get("id"):
             raise ValueError("Invalid media info provided")
             
         media_id = media_info["id"]
         media_type = media_info["type"]
-        mime_type = media_info.get("mime_type", "")
         
         try:
             # Get media URL from WhatsApp API
             media_url = MediaHandler._get_media_url(media_id)
             
-            # Download media content
-            media_bytes = MediaHandler._download_media_content(media_url)
-            
             # Generate filename
             filename = MediaHandler._generate_filename(media_info)
             
-            # Ensure save directory exists
-            os.makedirs(save_directory, exist_ok=True)
-            
-            # Save file
+            # Download media content into the file
             file_path = os.path.join(save_directory, filename)
-            with open(file_path, 'wb') as f:
-                f.write(media_bytes)
+            media_size = MediaHandler._download_media_to_file(media_url, file_path)
                 
-            logging.info(f"Saved {media_type} media: {file_path} ({len(media_bytes)} bytes)")
+            logging.info(f"Saved {media_type} media: {file_path} ({media_size} bytes)")
             
-            return file_path, media_bytes
+            return file_path, media_size
             
         except Exception as e:
             logging.error(f"Failed to process incoming media {media_id}: {e}")
@@ -272,31 +337,62 @@ class MediaHandler:
     @staticmethod
     def _get_media_url(media_id: str) -> str:
         """Get media download URL from WhatsApp API."""
-        url = f"https://graph.facebook.com/{current_app.config['VERSION']}/{media_id}"
-        headers = {
-            "Authorization": f"Bearer {current_app.config['ACCESS_TOKEN']}",
-        }
+        config = current_app.config
+        url = f"{config['WHATSAPP_GRAPH_URL']}/{media_id}"
         
         try:
-            response = requests.get(url, headers=headers, timeout=10)
-            response.raise_for_status()
-            data = response.json()
+            response = graph_session.get(url, headers=config["WHATSAPP_AUTH_HEADERS"], timeout=10)
+            if response.status_code >= 400:
+                raise requests.HTTPError(f"{response.status_code} {response.reason}", response=response)
+            # Parse the raw bytes directly; only "url" is needed
+            data = orjson.loads(response.content) if orjson is not None else response.json()
             return data.get("url")
         except requests.RequestException as e:
             logging.error(f"Failed to get media URL for {media_id}: {e}")
             raise
     
     @staticmethod
-    def _download_media_content(media_url: str) -> bytes:
-        """Download media content from WhatsApp CDN."""
-        headers = {
-            "Authorization": f"Bearer {current_app.config['ACCESS_TOKEN']}",
-        }
+    def _download_media_to_file(media_url: str, file_path: str) -> int:
+        """Stream media content from WhatsApp CDN into file_path and return its size."""
+        headers = current_app.config["WHATSAPP_DOWNLOAD_HEADERS"]
+        
+        try:
+            with graph_session.get(media_url, headers=headers, stream=True, timeout=30) as response:
+                if response.status_code >= 400:
+                    raise requests.HTTPError(f"{response.status_code} {response.reason}", response=response)
+                
+                # Create the save directory only if opening the file shows it is missing
+                try:
+                    f = open(file_path, 'wb')
+                except FileNotFoundError:
+                    os.makedirs(os.path.dirname(file_path) or ".", exist_ok=True)
+                    f = open(file_path, 'wb')
+                
+                media_size = 0
+                try:
+                    with f:
+                        for chunk in response.iter_content(chunk_size=65536):
+                            f.write(chunk)
+                            media_size += len(chunk)
+                except Exception:
+                    # Don't leave a truncated file behind
+                    os.remove(file_path)
+                    raise
+                return media_size
+        except requests.RequestException as e:
+            logging.error(f"Failed to download media from {media_url}: {e}")
+            raise
+    
+    @staticmethod
+    def _download_media_size(media_url: str) -> int:
+        """Stream media content from WhatsApp CDN and return its size without keeping it."""
+        headers = current_app.config["WHATSAPP_DOWNLOAD_HEADERS"]
         
         try:
-            response = requests.get(media_url, headers=headers, timeout=30)
-            response.raise_for_status()
-            return response.content
+            with graph_session.get(media_url, headers=headers, stream=True, timeout=30) as response:
+                if response.status_code >= 400:
+                    raise requests.HTTPError(f"{response.status_code} {response.reason}", response=response)
+                return sum(len(chunk) for chunk in response.iter_content(chunk_size=65536))
         except requests.RequestException as e:
             logging.error(f"Failed to download media from {media_url}: {e}")
             raise
@@ -313,19 +409,23 @@ class MediaHandler:
         if original_filename and media_type == "document":
             return f"{media_id}_{original_filename}"
         
-        # Generate extension from MIME type
-        extension = MediaHandler.MIME_TO_EXTENSION.get(mime_type, "")
-        if not extension:
-            # Fallback extensions based on media type
-            fallback_extensions = {
-                "image": ".jpg",
-                "audio": ".mp3", 
-                "video": ".mp4",
-                "document": ".pdf"
-            }
-            extension = fallback_extensions.get(media_type, ".bin")
+        return f"{media_id}_{media_type}{MediaHandler._extension_for(mime_type, media_type)}"
+    
+    @staticmethod
+    @functools.lru_cache(maxsize=64)
+    def _extension_for(mime_type: Optional[str], media_type: str) -> str:
+        """
+        File extension for a MIME type, falling back on the media type.
         
-        return f"{media_id}_{media_type}{extension}"
+        Parameters such as "; codecs=opus" (sent with voice notes) are ignored.
+        Only a handful of (MIME, media type) pairs occur, so results are cached.
+        """
+        extension = MediaHandler.MIME_TO_EXTENSION.get(mime_type)
+        # extract_media_info stores None when the webhook carries no mime_type
+        if extension is None and mime_type:
+            base_type = mime_type.split(";", 1)[0].strip().lower()
+            extension = MediaHandler.MIME_TO_EXTENSION.get(base_type)
+        return extension or MediaHandler._FALLBACK_EXT.get(media_type, ".bin")
     
     @staticmethod
     def get_message_content(message: Dict[str, Any]) -> Dict[str, Any]:
@@ -345,49 +445,92 @@ class MediaHandler:
             "message_id": message.get("id")
         }
         
-        if message_type == "text":
-            content["text"] = message.get("text", {}).get("body", "")
-            
-        elif message_type in {"image", "audio", "video", "document"}:
-            media_info = MediaHandler.extract_media_info(message)
-            content["media"] = media_info
-            
-        elif message_type == "location":
-            location_data = message.get("location", {})
-            content["location"] = {
-                "latitude": location_data.get("latitude"),
-                "longitude": location_data.get("longitude"),
-                "name": location_data.get("name"),
-                "address": location_data.get("address")
-            }
-            
-        elif message_type == "interactive":
-            interactive_data = message.get("interactive", {})
-            content["interactive"] = {
-                "type": interactive_data.get("type"),
-                "button_reply": interactive_data.get("button_reply"),
-                "list_reply": interactive_data.get("list_reply")
-            }
-            
-        elif message_type == "contacts":
-            content["contacts"] = message.get("contacts", [])
-            
-        else:
-            content["raw"] = message
-            
+        _CONTENT_PARSERS.get(message_type, _parse_raw)(message, content)
+        
         return content
 
 
+def _parse_text(message: Dict[str, Any], content: Dict[str, Any]) -> None:
+    content["text"] = message.get("text", _EMPTY).get("body", "")
+
+
+def _parse_media(message: Dict[str, Any], content: Dict[str, Any]) -> None:
+    content["media"] = MediaHandler.extract_media_info(message)
+
+
+def _parse_location(message: Dict[str, Any], content: Dict[str, Any]) -> None:
+    location_data = message.get("location", _EMPTY)
+    content["location"] = {
+        "latitude": location_data.get("latitude"),
+        "longitude": location_data.get("longitude"),
+        "name": location_data.get("name"),
+        "address": location_data.get("address")
+    }
+
+
+def _parse_interactive(message: Dict[str, Any], content: Dict[str, Any]) -> None:
+    interactive_data = message.get("interactive", _EMPTY)
+    content["interactive"] = {
+        "type": interactive_data.get("type"),
+        "button_reply": interactive_data.get("button_reply"),
+        "list_reply": interactive_data.get("list_reply")
+    }
+
+
+def _parse_contacts(message: Dict[str, Any], content: Dict[str, Any]) -> None:
+    content["contacts"] = message.get("contacts", [])
+
+
+def _parse_raw(message: Dict[str, Any], content: Dict[str, Any]) -> None:
+    content["raw"] = message
+
+
+# get_message_content dispatch: message type -> parser filling in the content dict
+_CONTENT_PARSERS = {
+    "text": _parse_text,
+    **{media_type: _parse_media for media_type in _MEDIA_TYPES},
+    "location": _parse_location,
+    "interactive": _parse_interactive,
+    "contacts": _parse_contacts,
+}
+
+
+def get_webhook_value(body):
+    """
+    Return the "value" object of the first change in a webhook payload, or None.
+    """
+    try:
+        return body["entry"][0]["changes"][0]["value"] or None
+    except (KeyError, IndexError, TypeError):
+        return None
+
+
+def classify_webhook(body):
+    """
+    Classify a webhook payload in a single walk of its entry/changes path.
+
+    Returns:
+        Tuple of (kind, value) where kind is "status", "message" or "invalid"
+        and value is the payload's inner "value" object (or None).
+    """
+    value = get_webhook_value(body)
+    if value is None:
+        return "invalid", None
+    if value.get("statuses"):
+        return "status", value
+    if body.get("object") and value.get("messages"):
+        return "message", value
+    return "invalid", value
+
+
 def is_valid_whatsapp_message(body):
     """
     Check if the incoming webhook event has a valid WhatsApp message structure.
     """
-    return (
-        body.get("object")
-        and body.get("entry")
-        and body["entry"][0].get("changes")
-        and body["entry"][0]["changes"][0].get("value")
-        and body["entry"][0]["changes"][0]["value"].get("messages")
-        and body["entry"][0]["changes"][0]["value"]["messages"][0]
-    )
-
+    try:
+        return bool(
+            body.get("object")
+            and body["entry"][0]["changes"][0]["value"]["messages"][0]
+        )
+    except (KeyError, IndexError, TypeError):
+        return False
@@ -3,16 +3,40 @@ import json
 
 from flask import Blueprint, request, jsonify, current_app
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 from .decorators.security import signature_required
 from .utils.whatsapp_utils import (
     process_whatsapp_message,
-    is_valid_whatsapp_message,
+    classify_webhook,
 )
 from .whatsapp_client import WhatsAppClient
 from .webhook_handler import WebhookHandler
+from . import webhook_queue
 
 webhook_blueprint = Blueprint("webhook", __name__)
 
+# Pre-serialized bodies for the fixed replies (same bytes jsonify produces)
+_OK_BODY = b'{"status":"ok"}\n'
+_HEALTH_BODY = b'{"service":"whatsapp-bot","status":"healthy"}\n'
+
+
+def _json_response(body: bytes, status: int = 200):
+    """Wrap an already-encoded JSON body in a fresh response, skipping serialization."""
+    return current_app.response_class(body, status=status, mimetype="application/json")
+
+
+def _format_payload(body):
+    """Pretty-print a webhook payload for logging."""
+    if not body:
+        return "None"
+    if orjson is not None:
+        return orjson.dumps(body, option=orjson.OPT_INDENT_2).decode()
+    return json.dumps(body, indent=2)
+
 
 def handle_message():
     """
@@ -29,23 +53,23 @@ def handle_message():
         response: A tuple containing a JSON response and an HTTP status code.
     """
     body = request.get_json()
-    logging.info(f"Received webhook payload: {json.dumps(body, indent=2) if body else 'None'}")
+    # Pretty-printing the whole payload is costly; only do it if INFO is emitted
+    if logging.getLogger().isEnabledFor(logging.INFO):
+        logging.info("Received webhook payload: %s", _format_payload(body))
+
+    kind, value = classify_webhook(body)
 
     # Check if it's a WhatsApp status update
-    if (
-        body.get("entry", [{}])[0]
-        .get("changes", [{}])[0]
-        .get("value", {})
-        .get("statuses")
-    ):
+    if kind == "status":
         logging.info("Received a WhatsApp status update.")
-        return jsonify({"status": "ok"}), 200
+        return _json_response(_OK_BODY)
 
     try:
-        if is_valid_whatsapp_message(body):
-            # Use the new WebhookHandler for comprehensive message processing
-            WebhookHandler.process_whatsapp_message(body)
-            return jsonify({"status": "ok"}), 200
+        if kind == "message":
+            # Ack right away so Meta doesn't retry; the worker does the slow sends
+            if not webhook_queue.enqueue(current_app._get_current_object(), body):
+                WebhookHandler.process_whatsapp_message(body)
+            return _json_response(_OK_BODY)
         else:
             # if the request is not a WhatsApp API event, return an error
             return (
@@ -65,11 +89,12 @@ def verify():
     challenge = request.args.get("hub.challenge")
     
     # Enhanced logging for debugging
-    logging.info(f"Webhook verification attempt:")
-    logging.info(f"  Mode: {mode}")
-    logging.info(f"  Token received: {token}")
-    logging.info(f"  Challenge: {challenge}")
-    logging.info(f"  Expected token: {current_app.config.get('VERIFY_TOKEN', 'NOT_SET')}")
+    if logging.getLogger().isEnabledFor(logging.INFO):
+        logging.info("Webhook verification attempt:")
+        logging.info("  Mode: %s", mode)
+        logging.info("  Token received: %s", token)
+        logging.info("  Challenge: %s", challenge)
+        logging.info("  Expected token: %s", current_app.config.get("VERIFY_TOKEN", "NOT_SET"))
     
     # Check if a token and mode were sent
     if mode and token:
@@ -81,7 +106,7 @@ def verify():
             return challenge, 200
         else:
             # Responds with '403 Forbidden' if verify tokens do not match
-            logging.error(f"VERIFICATION_FAILED - Token mismatch. Expected: {expected_token}, Got: {token}")
+            logging.error("VERIFICATION_FAILED - Token mismatch. Expected: %s, Got: %s", expected_token, token)
             return jsonify({"status": "error", "message": "Verification failed"}), 403
     else:
         # Responds with '400 Bad Request' if verify tokens do not match
@@ -100,7 +125,7 @@ def webhook_post():
 
 @webhook_blueprint.route("/health", methods=["GET"])
 def health_check():
-    return jsonify({"status": "healthy", "service": "whatsapp-bot"}), 200
+    return _json_response(_HEALTH_BODY)
 
 @webhook_blueprint.route("/debug", methods=["GET"])
 def debug_info():
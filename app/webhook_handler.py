@@ -1,7 +1,74 @@
 import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial, wraps
+from types import MappingProxyType
 from typing import Dict, Any
-from .utils.whatsapp_utils import MediaHandler, send_text_message, mark_as_read
+from .utils.whatsapp_utils import (
+    MediaHandler,
+    send_text_message,
+    mark_as_read,
+    prebuild_text_message,
+    send_prebuilt_text_message,
+)
 from .services.media_service import MediaService
+from .utils.background import fire_and_forget, submit
+
+logger = logging.getLogger(__name__)
+
+# Sample media sends for chat commands, so a burst of commands runs in parallel
+_MEDIA_POOL = ThreadPoolExecutor(
+    max_workers=min(32, (os.cpu_count() or 1) * 4), thread_name_prefix="media"
+)
+
+# Shared read-only default for optional payload sections
+_EMPTY = MappingProxyType({})
+
+# WhatsApp delivers webhooks at least once; remember recent message ids to drop redeliveries
+_SEEN_TTL = 600
+_SEEN_MAX = 10000
+_seen_ids: "OrderedDict[str, float]" = OrderedDict()
+_seen_lock = threading.Lock()
+
+
+def _first_delivery(message_id: str) -> bool:
+    """Record message_id and return False if it was already seen within _SEEN_TTL seconds."""
+    if not message_id:
+        return True
+    now = time.monotonic()
+    with _seen_lock:
+        # Entries are in insertion order, so expired ones are at the front
+        while _seen_ids:
+            oldest_id, expires = next(iter(_seen_ids.items()))
+            if expires > now and len(_seen_ids) < _SEEN_MAX:
+                break
+            del _seen_ids[oldest_id]
+        if message_id in _seen_ids:
+            return False
+        _seen_ids[message_id] = now + _SEEN_TTL
+        return True
+
+
+def safe_handler(fallback_message: str):
+    """
+    Decorate a handler taking wa_id first so any exception is logged and the
+    user gets fallback_message instead of silence.
+    """
+    fallback_body = prebuild_text_message(fallback_message)
+    
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(wa_id: str, *args, **kwargs):
+            try:
+                return fn(wa_id, *args, **kwargs)
+            except Exception:
+                logger.exception("Handler %s failed", fn.__name__)
+                fire_and_forget(send_prebuilt_text_message, wa_id, fallback_body)
+        return wrapper
+    return decorator
 
 
 class WebhookHandler:
@@ -19,32 +86,26 @@ class WebhookHandler:
         """
         try:
             # Extract basic message info
-            wa_id = body["entry"][0]["changes"][0]["value"]["contacts"][0]["wa_id"]
-            name = body["entry"][0]["changes"][0]["value"]["contacts"][0]["profile"]["name"]
-            message = body["entry"][0]["changes"][0]["value"]["messages"][0]
+            value = body["entry"][0]["changes"][0]["value"]
+            contact = value["contacts"][0]
+            wa_id = contact["wa_id"]
+            name = contact["profile"]["name"]
+            message = value["messages"][0]
             message_type = message.get("type", "text")
             message_id = message.get("id")
             
-            # Always mark inbound messages as read for better UX
-            try:
-                mark_as_read(message_id)
-            except Exception as e:
-                logging.warning(f"Failed to mark message as read: {e}")
+            if not _first_delivery(message_id):
+                logger.info("Ignoring redelivered message %s", message_id)
+                return
+            
+            # Always mark inbound messages as read for better UX; nothing waits on the receipt
+            fire_and_forget(mark_as_read, message_id)
             
             # Route to appropriate handler based on message type
-            if message_type == "text":
-                WebhookHandler.handle_text_message(wa_id, name, message)
-            elif message_type in {"image", "audio", "video", "document"}:
-                WebhookHandler.handle_media_message(wa_id, name, message)
-            elif message_type == "location":
-                WebhookHandler.handle_location_message(wa_id, name, message)
-            elif message_type == "interactive":
-                WebhookHandler.handle_interactive_message(wa_id, name, message)
-            else:
-                WebhookHandler.handle_unsupported_message(wa_id, name, message)
+            _ROUTES.get(message_type, WebhookHandler.handle_unsupported_message)(wa_id, name, message)
                 
         except Exception as e:
-            logging.error(f"Error processing WhatsApp message: {e}")
+            logger.error("Error processing WhatsApp message: %s", e)
             # Try to send error message to user if possible
             try:
                 if 'wa_id' in locals():
@@ -62,44 +123,27 @@ class WebhookHandler:
             name: Name of the sender
             message: The message object
         """
-        message_body = message.get("text", {}).get("body", "").strip().lower()
+        message_body = message.get("text", _EMPTY).get("body", "").strip().lower()
         
-        logging.info(f"Received text message from {name} ({wa_id}): {message_body}")
+        logger.info("Received text message from %s (%s): %s", name, wa_id, message_body)
         
         # Simple command recognition for demo purposes
-        if message_body == "hello" or message_body == "hi":
-            response = f"Hello {name}! 👋 How can I help you today?"
-        elif message_body == "help":
-            response = """🤖 Available commands:
-• hello - Get a greeting
-• help - Show this help message
-• send image - Get a sample image
-• send audio - Get a sample audio
-• send video - Get a sample video
-• send document - Get a sample document
-• Just send me any media and I'll process it!"""
-        elif message_body == "send image":
-            WebhookHandler._handle_media_command(wa_id, name, "image")
-            return  # Don't send text response, media will be sent instead
-        elif message_body == "send audio":
-            WebhookHandler._handle_media_command(wa_id, name, "audio")
-            return  # Don't send text response, media will be sent instead
-        elif message_body == "send video":
-            WebhookHandler._handle_media_command(wa_id, name, "video")
-            return  # Don't send text response, media will be sent instead
-        elif message_body == "send document" or message_body == "send doc":
-            WebhookHandler._handle_media_command(wa_id, name, "document")
-            return  # Don't send text response, media will be sent instead
-        else:
+        command = _COMMANDS.get(message_body)
+        if command is None:
             # Echo the message in uppercase (simple demo behavior)
             response = f"You said: {message_body.upper()}"
+        else:
+            response = command(wa_id, name)
+            if response is None:
+                return  # The command already sent its response
         
         try:
             send_text_message(wa_id, response)
         except Exception as e:
-            logging.error(f"Failed to send text response: {e}")
+            logger.error("Failed to send text response: %s", e)
     
     @staticmethod
+    @safe_handler("Sorry, I encountered an error processing your media.")
     def handle_media_message(wa_id: str, name: str, message: Dict[str, Any]) -> None:
         """
         Handle incoming media messages (image, audio, video, document).
@@ -109,47 +153,41 @@ class WebhookHandler:
             name: Name of the sender
             message: The message object
         """
+        # Extract media information
+        media_info = MediaHandler.extract_media_info(message)
+        
+        if not media_info:
+            send_prebuilt_text_message(wa_id, _NO_MEDIA_BODY)
+            return
+        
+        media_type = media_info["type"]
+        caption = media_info.get("caption", "")
+        
+        logger.info("Received %s from %s (%s)", media_type, name, wa_id)
+        
+        # Process and download the media
         try:
-            # Extract media information
-            media_info = MediaHandler.extract_media_info(message)
-            
-            if not media_info:
-                send_text_message(wa_id, "Sorry, I couldn't process your media.")
-                return
-            
-            media_type = media_info["type"]
-            caption = media_info.get("caption", "")
-            
-            logging.info(f"Received {media_type} from {name} ({wa_id})")
-            
-            # Process and download the media
-            try:
-                file_path, media_bytes = MediaHandler.process_incoming_media(media_info)
-                
-                # Create response message
-                response_parts = [f"✅ Got your {media_type}!"]
-                response_parts.append(f"📁 Saved as: {file_path}")
-                response_parts.append(f"📊 Size: {len(media_bytes):,} bytes")
-                
-                if caption:
-                    response_parts.append(f"💬 Caption: {caption}")
-                
-                if media_info.get("filename"):
-                    response_parts.append(f"📄 Filename: {media_info['filename']}")
-                
-                response = "\n".join(response_parts)
-                
-            except Exception as e:
-                logging.error(f"Failed to process media: {e}")
-                response = f"❌ Sorry, I couldn't download your {media_type}. Please try again."
+            file_path, media_size = MediaHandler.process_incoming_media(media_info)
             
-            send_text_message(wa_id, response)
+            # Create response message
+            filename = media_info.get("filename")
+            response_parts = (
+                f"✅ Got your {media_type}!",
+                f"📁 Saved as: {file_path}",
+                f"📊 Size: {media_size:,} bytes",
+                caption and f"💬 Caption: {caption}",
+                filename and f"📄 Filename: {filename}",
+            )
+            response = "\n".join(part for part in response_parts if part)
             
         except Exception as e:
-            logging.error(f"Error handling media message: {e}")
-            send_text_message(wa_id, "Sorry, I encountered an error processing your media.")
+            logger.error("Failed to process media: %s", e)
+            response = f"❌ Sorry, I couldn't download your {media_type}. Please try again."
+        
+        send_text_message(wa_id, response)
     
     @staticmethod
+    @safe_handler("Sorry, I couldn't process your location.")
     def handle_location_message(wa_id: str, name: str, message: Dict[str, Any]) -> None:
         """
         Handle incoming location messages.
@@ -159,32 +197,25 @@ class WebhookHandler:
             name: Name of the sender
             message: The message object
         """
-        try:
-            location_data = message.get("location", {})
-            latitude = location_data.get("latitude")
-            longitude = location_data.get("longitude")
-            location_name = location_data.get("name", "")
-            address = location_data.get("address", "")
-            
-            logging.info(f"Received location from {name} ({wa_id}): {latitude}, {longitude}")
-            
-            response_parts = ["📍 Thanks for sharing your location!"]
-            response_parts.append(f"🌐 Coordinates: {latitude}, {longitude}")
-            
-            if location_name:
-                response_parts.append(f"🏷️ Name: {location_name}")
-            
-            if address:
-                response_parts.append(f"🏠 Address: {address}")
-            
-            response = "\n".join(response_parts)
-            send_text_message(wa_id, response)
-            
-        except Exception as e:
-            logging.error(f"Error handling location message: {e}")
-            send_text_message(wa_id, "Sorry, I couldn't process your location.")
+        location_data = message.get("location", _EMPTY)
+        latitude = location_data.get("latitude")
+        longitude = location_data.get("longitude")
+        location_name = location_data.get("name", "")
+        address = location_data.get("address", "")
+        
+        logger.info("Received location from %s (%s): %s, %s", name, wa_id, latitude, longitude)
+        
+        response_parts = (
+            "📍 Thanks for sharing your location!",
+            f"🌐 Coordinates: {latitude}, {longitude}",
+            location_name and f"🏷️ Name: {location_name}",
+            address and f"🏠 Address: {address}",
+        )
+        response = "\n".join(part for part in response_parts if part)
+        send_text_message(wa_id, response)
     
     @staticmethod
+    @safe_handler("Sorry, I couldn't process your interactive message.")
     def handle_interactive_message(wa_id: str, name: str, message: Dict[str, Any]) -> None:
         """
         Handle incoming interactive messages (button replies, list replies).
@@ -194,40 +225,35 @@ class WebhookHandler:
             name: Name of the sender
             message: The message object
         """
-        try:
-            interactive_data = message.get("interactive", {})
-            interactive_type = interactive_data.get("type")
+        interactive_data = message.get("interactive", _EMPTY)
+        interactive_type = interactive_data.get("type")
+        
+        logger.info("Received interactive message from %s (%s): %s", name, wa_id, interactive_type)
+        
+        if interactive_type == "button_reply":
+            button_reply = interactive_data.get("button_reply", _EMPTY)
+            button_id = button_reply.get("id")
+            button_title = button_reply.get("title")
             
-            logging.info(f"Received interactive message from {name} ({wa_id}): {interactive_type}")
+            response = f"🔘 You clicked: {button_title} (ID: {button_id})"
             
-            if interactive_type == "button_reply":
-                button_reply = interactive_data.get("button_reply", {})
-                button_id = button_reply.get("id")
-                button_title = button_reply.get("title")
-                
-                response = f"🔘 You clicked: {button_title} (ID: {button_id})"
-                
-            elif interactive_type == "list_reply":
-                list_reply = interactive_data.get("list_reply", {})
-                list_id = list_reply.get("id")
-                list_title = list_reply.get("title")
-                list_description = list_reply.get("description", "")
-                
-                response_parts = [f"📋 You selected: {list_title}"]
-                if list_description:
-                    response_parts.append(f"📝 Description: {list_description}")
-                response_parts.append(f"🆔 ID: {list_id}")
-                
-                response = "\n".join(response_parts)
-                
-            else:
-                response = f"🤖 Received interactive message of type: {interactive_type}"
+        elif interactive_type == "list_reply":
+            list_reply = interactive_data.get("list_reply", _EMPTY)
+            list_id = list_reply.get("id")
+            list_title = list_reply.get("title")
+            list_description = list_reply.get("description", "")
             
-            send_text_message(wa_id, response)
+            response_parts = (
+                f"📋 You selected: {list_title}",
+                list_description and f"📝 Description: {list_description}",
+                f"🆔 ID: {list_id}",
+            )
+            response = "\n".join(part for part in response_parts if part)
             
-        except Exception as e:
-            logging.error(f"Error handling interactive message: {e}")
-            send_text_message(wa_id, "Sorry, I couldn't process your interactive message.")
+        else:
+            response = f"🤖 Received interactive message of type: {interactive_type}"
+        
+        send_text_message(wa_id, response)
     
     @staticmethod
     def handle_unsupported_message(wa_id: str, name: str, message: Dict[str, Any]) -> None:
@@ -241,73 +267,109 @@ class WebhookHandler:
         """
         message_type = message.get("type", "unknown")
         
-        logging.info(f"Received unsupported message type from {name} ({wa_id}): {message_type}")
+        logger.info("Received unsupported message type from %s (%s): %s", name, wa_id, message_type)
         
         response = f"🤷‍♂️ Sorry, I don't support {message_type} messages yet. Try sending text, images, audio, video, documents, or locations!"
         
         try:
             send_text_message(wa_id, response)
         except Exception as e:
-            logging.error(f"Failed to send unsupported message response: {e}")
+            logger.error("Failed to send unsupported message response: %s", e)
     
     @staticmethod
     def _handle_media_command(wa_id: str, name: str, media_type: str) -> None:
         """
         Handle media sending commands (send image, send audio, send video, send document).
         
+        The send runs on _MEDIA_POOL so the webhook worker can move on to the next message.
+        
         Args:
             wa_id: WhatsApp ID of the sender
             name: Name of the sender
             media_type: Type of media to send ('image', 'audio', 'video', 'document')
         """
-        try:
-            logging.info(f"Processing {media_type} command from {name} ({wa_id})")
-            
-            # Send a quick acknowledgment
-            media_emojis = {
-                "image": "📸",
-                "audio": "🎵", 
-                "video": "🎬",
-                "document": "📄"
-            }
-            
-            emoji = media_emojis.get(media_type, "📎")
-            ack_message = f"{emoji} Sending sample {media_type}... Please wait!"
-            
-            try:
-                send_text_message(wa_id, ack_message)
-            except Exception as e:
-                logging.warning(f"Failed to send acknowledgment: {e}")
-            
-            # Send the sample media
-            result = MediaService.send_sample_media(media_type, wa_id)
-            
-            if result["success"]:
-                logging.info(f"Successfully sent sample {media_type} to {name} ({wa_id})")
-                
-                # Send success confirmation
-                success_message = f"✅ Sample {media_type} sent successfully!"
-                try:
-                    send_text_message(wa_id, success_message)
-                except Exception as e:
-                    logging.warning(f"Failed to send success confirmation: {e}")
-                    
-            else:
-                error_msg = result.get("error", "Unknown error")
-                logging.error(f"Failed to send sample {media_type}: {error_msg}")
-                
-                # Send error message to user
-                error_response = f"❌ Sorry, I couldn't send the sample {media_type}. Please try again later."
-                try:
-                    send_text_message(wa_id, error_response)
-                except Exception as e:
-                    logging.error(f"Failed to send error message: {e}")
-                    
-        except Exception as e:
-            logging.error(f"Error handling {media_type} command: {e}")
-            
-            # Send generic error message
-            try:
-                send_text_message(wa_id, f"❌ Sorry, I encountered an error while processing your {media_type} request.")
-            except:
-                pass  # Don't let error handling cause more errors
\ No newline at end of file
+        logger.info("Processing %s command from %s (%s)", media_type, name, wa_id)
+        submit(_MEDIA_POOL, WebhookHandler._send_sample_media, wa_id, name, media_type)
+    
+    @staticmethod
+    @safe_handler("❌ Sorry, I encountered an error while processing your request.")
+    def _send_sample_media(wa_id: str, name: str, media_type: str) -> None:
+        """
+        Send the sample media for a command and report failures to the user.
+        
+        Args:
+            wa_id: WhatsApp ID of the sender
+            name: Name of the sender
+            media_type: Type of media to send ('image', 'audio', 'video', 'document')
+        """
+        # One Graph call: the acknowledgement rides along as the caption, and
+        # WhatsApp's delivery ticks replace the old success text
+        caption = f"{_MEDIA_EMOJIS.get(media_type, '📎')} Sample {media_type}"
+        result = MediaService.send_sample_media(media_type, wa_id, caption=caption)
+        
+        if result["success"]:
+            logger.info("Successfully sent sample %s to %s (%s)", media_type, name, wa_id)
+            if media_type not in _CAPTIONED_MEDIA:
+                # Audio can't carry a caption, so acknowledge it with a text instead
+                fire_and_forget(send_text_message, wa_id, caption)
+            return
+        
+        logger.error("Failed to send sample %s: %s", media_type, result.get("error", "Unknown error"))
+        send_text_message(wa_id, f"❌ Sorry, I couldn't send the sample {media_type}. Please try again later.")
+
+
+# Emoji prefixing the caption of each sample media command's reply
+_MEDIA_EMOJIS = {
+    "image": "📸",
+    "audio": "🎵",
+    "video": "🎬",
+    "document": "📄",
+}
+# Media types whose messages can carry a caption
+_CAPTIONED_MEDIA = frozenset({"image", "video", "document"})
+
+_HELP_TEXT = """🤖 Available commands:
+• hello - Get a greeting
+• help - Show this help message
+• send image - Get a sample image
+• send audio - Get a sample audio
+• send video - Get a sample video
+• send document - Get a sample document
+• Just send me any media and I'll process it!"""
+
+# Request bodies for fixed replies, serialized once at import
+_HELP_BODY = prebuild_text_message(_HELP_TEXT)
+_NO_MEDIA_BODY = prebuild_text_message("Sorry, I couldn't process your media.")
+
+
+def _greet(wa_id: str, name: str) -> str:
+    return f"Hello {name}! 👋 How can I help you today?"
+
+
+def _help(wa_id: str, name: str) -> None:
+    send_prebuilt_text_message(wa_id, _HELP_BODY)
+
+
+# Message type -> handler, looked up once per inbound message
+_ROUTES = {
+    "text": WebhookHandler.handle_text_message,
+    "image": WebhookHandler.handle_media_message,
+    "audio": WebhookHandler.handle_media_message,
+    "video": WebhookHandler.handle_media_message,
+    "document": WebhookHandler.handle_media_message,
+    "location": WebhookHandler.handle_location_message,
+    "interactive": WebhookHandler.handle_interactive_message,
+}
+
+# Lower-cased text command -> callable(wa_id, name) returning the reply text,
+# or None when the command sends its own response (help, media commands)
+_COMMANDS = {
+    "hello": _greet,
+    "hi": _greet,
+    "help": _help,
+    "send image": partial(WebhookHandler._handle_media_command, media_type="image"),
+    "send audio": partial(WebhookHandler._handle_media_command, media_type="audio"),
+    "send video": partial(WebhookHandler._handle_media_command, media_type="video"),
+    "send document": partial(WebhookHandler._handle_media_command, media_type="document"),
+    "send doc": partial(WebhookHandler._handle_media_command, media_type="document"),
+}
@@ -0,0 +1,97 @@
+import atexit
+import logging
+import os
+import queue
+import threading
+import time
+from typing import Any, Dict
+
+from .webhook_handler import WebhookHandler
+
+# Payloads waiting for a worker; bounded so a burst can't grow memory without limit
+_MAX_PENDING = 10000
+# Put on the queue to ask a worker to exit once everything before it is done
+_STOP = None
+
+
+def init_app(app) -> None:
+    """
+    Start the background workers that run WebhookHandler for app's webhooks.
+
+    Replies are synchronous Graph calls, so several workers share the queue
+    to keep one slow send from holding up every other user. The count comes
+    from WEBHOOK_WORKERS (default 8).
+
+    Args:
+        app: The Flask application whose context the workers push
+    """
+    pending = queue.Queue(maxsize=_MAX_PENDING)
+    workers = tuple(
+        threading.Thread(
+            target=_worker, args=(app, pending), name=f"webhook-worker-{i}", daemon=True
+        )
+        for i in range(max(1, int(os.getenv("WEBHOOK_WORKERS", "8"))))
+    )
+    app.extensions["webhook_queue"] = (pending, workers)
+    for worker in workers:
+        worker.start()
+    atexit.register(shutdown, app)
+
+
+def enqueue(app, body: Dict[str, Any]) -> bool:
+    """
+    Hand a message webhook to the background workers.
+
+    Args:
+        app: The Flask application that received the webhook
+        body: The webhook payload from WhatsApp
+
+    Returns:
+        False if there is no worker or the queue is full; the caller should
+        then process the payload itself.
+    """
+    try:
+        pending, _ = app.extensions["webhook_queue"]
+        pending.put_nowait(body)
+        return True
+    except KeyError:
+        return False
+    except queue.Full:
+        logging.warning("Webhook queue is full, processing inline")
+        return False
+
+
+def shutdown(app, timeout: float = 10.0) -> None:
+    """
+    Let the workers finish the payloads already queued, then stop them.
+
+    Waits at most timeout seconds in total, including for room on a full queue.
+    """
+    entry = app.extensions.pop("webhook_queue", None)
+    if entry is None:
+        return
+    pending, workers = entry
+    deadline = time.monotonic() + timeout
+    # One stop marker per worker; each exits after taking its marker
+    try:
+        for _ in workers:
+            pending.put(_STOP, timeout=max(0.0, deadline - time.monotonic()))
+    except queue.Full:
+        # Runs from atexit, so never hold up interpreter exit on a full queue
+        logging.warning("Webhook queue still full after %ss, not waiting for workers", timeout)
+        return
+    for worker in workers:
+        worker.join(max(0.0, deadline - time.monotonic()))
+
+
+def _worker(app, pending: queue.Queue) -> None:
+    while True:
+        body = pending.get()
+        if body is _STOP:
+            return
+        try:
+            with app.app_context():
+                WebhookHandler.process_whatsapp_message(body)
+        except Exception as e:
+            # process_whatsapp_message handles its own errors; keep the worker alive regardless
+            logging.error(f"Webhook worker failed to process payload: {e}")
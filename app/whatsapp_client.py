@@ -3,95 +3,268 @@ import requests
 from requests.exceptions import RequestException
 import os
 import json
-from flask import current_app
-
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import lru_cache
+from typing import Any, BinaryIO, Callable, Dict, Iterable, List, Tuple, Union
+from flask import current_app, has_app_context
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    # Streams multipart uploads instead of building the whole body in memory
+    from requests_toolbelt import MultipartEncoder
+except ImportError:
+    MultipartEncoder = None
+
+from .config import build_whatsapp_endpoints
+from .whatsapp_payloads import (
+    media_info_url,
+    media_message_body,
+    message_body,
+    mime_for_path,
+    read_receipt_body,
 )
+from .utils.background import fire_and_forget, submit
+from .utils.http_client import graph_session
+
+# Logging is configured by the app (see config.configure_logging), not by this module
+logger = logging.getLogger(__name__)
+
+def graph_settings():
+    """
+    Get the Graph settings: VERSION, PHONE_NUMBER_ID, ACCESS_TOKEN and the
+    precomputed WHATSAPP_* URLs and headers (see build_whatsapp_endpoints).
+
+    Inside an app context these are the entries create_app stored in the
+    app config; otherwise they are built once from environment variables.
+    """
+    if has_app_context():
+        return current_app.config
+    return _env_graph_settings()
+
+@lru_cache(maxsize=1)
+def _env_graph_settings():
+    settings = {
+        "VERSION": os.getenv("VERSION", "v21.0"),
+        "PHONE_NUMBER_ID": os.getenv("PHONE_NUMBER_ID"),
+        "ACCESS_TOKEN": os.getenv("ACCESS_TOKEN"),
+    }
+    settings.update(build_whatsapp_endpoints(settings))
+    return settings
+
+def reset_settings_cache():
+    """Forget the environment-derived settings, e.g. after rotating ACCESS_TOKEN."""
+    _env_graph_settings.cache_clear()
+
+
+class _RateLimiter:
+    """
+    Sliding-window request limiter shared by every WhatsAppClient call.
+
+    Proactive: at most `limit` requests are sent in any 60s window.
+    Reactive: Meta's usage header and 429 responses pause sending, and a 429
+    halves the window limit, which then grows back by one per good response.
+    """
+
+    WINDOW = 60.0
+    # Back off once any usage metric reported by Meta passes this percentage
+    USAGE_THRESHOLD = 90
+
+    def __init__(self, limit: int):
+        self.max_limit = limit
+        self.limit = float(limit)
+        self._sent = deque()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        """Block until a request may be sent, then record it."""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                while self._sent and self._sent[0] <= now - self.WINDOW:
+                    self._sent.popleft()
+                if now < self._paused_until:
+                    wait = self._paused_until - now
+                elif len(self._sent) >= int(self.limit):
+                    wait = self._sent[0] + self.WINDOW - now
+                else:
+                    self._sent.append(now)
+                    return
+            time.sleep(wait)
+
+    def observe(self, response) -> None:
+        """Adjust the limiter from a Graph API response."""
+        with self._lock:
+            if response.status_code == 429:
+                self.limit = max(1.0, self.limit / 2)
+                self._pause(self._retry_after(response))
+                return
+            self.limit = min(float(self.max_limit), self.limit + 1)
+            if self._usage_percent(response) > self.USAGE_THRESHOLD:
+                self._pause(self._retry_after(response))
+
+    def _pause(self, seconds: float) -> None:
+        self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+    @staticmethod
+    def _retry_after(response) -> float:
+        try:
+            return float(response.headers.get("retry-after", 1))
+        except ValueError:
+            return 1.0
+
+    @staticmethod
+    def _usage_percent(response) -> float:
+        usage = response.headers.get("x-business-use-case-usage")
+        if not usage:
+            return 0
+        try:
+            # {"<business id>": [{"call_count": 12, "total_cputime": 3, "total_time": 5, ...}]}
+            return max(
+                entry.get(metric, 0)
+                for entries in json.loads(usage).values()
+                for entry in entries
+                for metric in ("call_count", "total_cputime", "total_time")
+            )
+        except (ValueError, TypeError, AttributeError):
+            return 0
+
+
+# WhatsApp Cloud API default throughput is 80 messages/second per number
+_rate_limiter = _RateLimiter(limit=80 * 60)
+
+
+def _rate_limited_request(method: str, url: str, **kwargs):
+    """Send a Graph API request through the shared session, respecting rate limits."""
+    _rate_limiter.acquire()
+    response = graph_session.request(method, url, **kwargs)
+    _rate_limiter.observe(response)
+    return response
+
+
+def _rate_limited_send(prepared: requests.PreparedRequest, **kwargs):
+    """Send an already prepared Graph API request, respecting rate limits."""
+    _rate_limiter.acquire()
+    response = graph_session.send(prepared, **kwargs)
+    _rate_limiter.observe(response)
+    return response
+
+
+@lru_cache(maxsize=4)
+def _read_receipt_request(url: str, authorization: str):
+    """
+    Prepared mark_as_read request for url, plus the send settings for it.
+
+    Header merging, URL parsing and the environment proxy lookup happen once
+    here; each call only copies the request and swaps in its body.
+    """
+    prepared = graph_session.prepare_request(requests.Request(
+        "POST",
+        url,
+        headers={"Content-type": "application/json", "Authorization": authorization},
+    ))
+    send_kwargs = graph_session.merge_environment_settings(url, {}, None, None, None)
+    return prepared, send_kwargs
+
+
+def _json_response(response):
+    """Decode a JSON response body, with orjson when installed."""
+    if orjson is not None:
+        try:
+            return orjson.loads(response.content)
+        except orjson.JSONDecodeError as e:
+            # Raise what response.json() would, so except RequestException still applies
+            raise requests.exceptions.JSONDecodeError(e.msg, e.doc, e.pos, response=response)
+    return response.json()
+
 
-# Helper function to get config values
-def _get_config_value(key: str, default=None):
-    """Get configuration value from Flask app context or environment variables."""
-    try:
-        # Try to get from Flask app config first
-        if current_app:
-            return current_app.config.get(key, os.getenv(key, default))
-    except RuntimeError:
-        # If no app context, fall back to environment variables
-        pass
-    return os.getenv(key, default)
+# send_bulk retries an item answered with one of these statuses
+_BULK_RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+_BULK_MAX_ATTEMPTS = 4
 
-def _get_api_url():
-    """Get the API URL with proper version."""
-    version = _get_config_value("VERSION", "v21.0")
-    return f"https://graph.facebook.com/{version}"
+
+def _bulk_retry_delay(response, attempt: int) -> float:
+    """Exponential backoff (0.5s, 1s, 2s, ...) that honours a longer retry-after."""
+    backoff = 0.5 * (2 ** attempt)
+    if "retry-after" in response.headers:
+        return max(backoff, _RateLimiter._retry_after(response))
+    return backoff
 
 
 class WhatsAppClient:
     """WhatsApp Business API client (Contributor 1)"""
 
     @staticmethod
-    def send_image(to: str, image_url: str = None, image_id: str = None, caption: str = "") -> dict:
+    def _send_media(to: str, media_type: str, media_url: str = None, media_id: str = None, **extras) -> dict:
         """
-        Send an image message
+        Send a media message of the given type; the send_* methods wrap this
 
         Args:
             to: Recipient's phone number
-            image_url: Public URL of the image (or use image_id)
-            image_id: Media ID from WhatsApp upload (or use image_url)
-            caption: Optional caption for the image
+            media_type: 'image', 'audio', 'video' or 'document'
+            media_url: Public URL of the media (or use media_id)
+            media_id: Media ID from WhatsApp upload (or use media_url)
+            **extras: Optional fields such as caption or filename; empty values are left out
 
         Returns:
             API response dict
         """
-        api_url = _get_api_url()
-        phone_number_id = _get_config_value("PHONE_NUMBER_ID")
-        access_token = _get_config_value("ACCESS_TOKEN")
-        
-        url = f"{api_url}/{phone_number_id}/messages"
-        headers = {
-            "Authorization": f"Bearer {access_token}",
-            "Content-Type": "application/json",
-        }
-
-        image_data = {}
-        if image_url:
-            image_data["link"] = image_url
-        elif image_id:
-            image_data["id"] = image_id
-        else:
-            raise ValueError("Either image_url or image_id must be provided")
-
-        if caption:
-            image_data["caption"] = caption
-
-        data = {
-            "messaging_product": "whatsapp",
-            "to": to,
-            "type": "image",
-            "image": image_data,
-        }
+        body = media_message_body(to, media_type, media_url, media_id, **extras)
+        return WhatsAppClient._post_message(body, f"send {media_type}")
 
+    @staticmethod
+    def _post_message(body: bytes, what: str) -> dict:
+        settings = graph_settings()
         try:
-            logging.info(f"Sending image request to WhatsApp API:")
-            logging.info(f"URL: {url}")
-            logging.info(f"Data: {json.dumps(data, indent=2)}")
-            
-            response = requests.post(url, headers=headers, json=data, timeout=10)
+            response = _rate_limited_request(
+                "POST",
+                settings["WHATSAPP_MESSAGES_URL"],
+                headers=settings["WHATSAPP_HEADERS"],
+                data=body,
+                timeout=10,
+            )
             response.raise_for_status()
-            
-            result = response.json()
-            logging.info(f"WhatsApp API Response: {json.dumps(result, indent=2)}")
-            
-            return result
+            return _json_response(response)
         except RequestException as e:
-            logging.error(f"Failed to send image: {e}")
-            if hasattr(e, 'response') and e.response:
-                logging.error(f"Response content: {e.response.text}")
+            logger.error("Failed to %s: %s", what, e)
+            # Response is falsy for error statuses, so test for presence explicitly
+            if e.response is not None:
+                logger.error("Response content: %s", e.response.text)
             raise
 
+    @staticmethod
+    def send_image(to: str, image_url: str = None, image_id: str = None, caption: str = "") -> dict:
+        """
+        Send an image message
+
+        Args:
+            to: Recipient's phone number
+            image_url: Public URL of the image (or use image_id)
+            image_id: Media ID from WhatsApp upload (or use image_url)
+            caption: Optional caption for the image
+
+        Returns:
+            API response dict
+        """
+        debug = logger.isEnabledFor(logging.DEBUG)
+        if debug:
+            # Only built for the trace; _send_media encodes its own copy
+            data = media_message_body(to, "image", image_url, image_id, caption=caption)
+            logger.debug("Sending image request to WhatsApp API")
+            logger.debug("URL: %s", graph_settings()["WHATSAPP_MESSAGES_URL"])
+            logger.debug("Data: %s", data.decode())
+        result = WhatsAppClient._send_media(to, "image", image_url, image_id, caption=caption)
+        if debug:
+            logger.debug("WhatsApp API Response: %s", result)
+        return result
+
     @staticmethod
     def send_audio(to: str, audio_url: str = None, audio_id: str = None) -> dict:
         """
@@ -105,38 +278,7 @@ class WhatsAppClient:
         Returns:
             API response dict
         """
-        api_url = _get_api_url()
-        phone_number_id = _get_config_value("PHONE_NUMBER_ID")
-        access_token = _get_config_value("ACCESS_TOKEN")
-        
-        url = f"{api_url}/{phone_number_id}/messages"
-        headers = {
-            "Authorization": f"Bearer {access_token}",
-            "Content-Type": "application/json",
-        }
-
-        audio_data = {}
-        if audio_url:
-            audio_data["link"] = audio_url
-        elif audio_id:
-            audio_data["id"] = audio_id
-        else:
-            raise ValueError("Either audio_url or audio_id must be provided")
-
-        data = {
-            "messaging_product": "whatsapp",
-            "to": to,
-            "type": "audio",
-            "audio": audio_data,
-        }
-
-        try:
-            response = requests.post(url, headers=headers, json=data, timeout=10)
-            response.raise_for_status()
-            return response.json()
-        except RequestException as e:
-            logging.error(f"Failed to send audio: {e}")
-            raise
+        return WhatsAppClient._send_media(to, "audio", audio_url, audio_id)
 
     @staticmethod
     def send_video(to: str, video_url: str = None, video_id: str = None, caption: str = "") -> dict:
@@ -152,41 +294,7 @@ class WhatsAppClient:
         Returns:
             API response dict
         """
-        api_url = _get_api_url()
-        phone_number_id = _get_config_value("PHONE_NUMBER_ID")
-        access_token = _get_config_value("ACCESS_TOKEN")
-        
-        url = f"{api_url}/{phone_number_id}/messages"
-        headers = {
-            "Authorization": f"Bearer {access_token}",
-            "Content-Type": "application/json",
-        }
-
-        video_data = {}
-        if video_url:
-            video_data["link"] = video_url
-        elif video_id:
-            video_data["id"] = video_id
-        else:
-            raise ValueError("Either video_url or video_id must be provided")
-
-        if caption:
-            video_data["caption"] = caption
-
-        data = {
-            "messaging_product": "whatsapp",
-            "to": to,
-            "type": "video",
-            "video": video_data,
-        }
-
-        try:
-            response = requests.post(url, headers=headers, json=data, timeout=10)
-            response.raise_for_status()
-            return response.json()
-        except RequestException as e:
-            logging.error(f"Failed to send video: {e}")
-            raise
+        return WhatsAppClient._send_media(to, "video", video_url, video_id, caption=caption)
 
     @staticmethod
     def send_document(
@@ -209,81 +317,60 @@ class WhatsAppClient:
         Returns:
             API response dict
         """
-        api_url = _get_api_url()
-        phone_number_id = _get_config_value("PHONE_NUMBER_ID")
-        access_token = _get_config_value("ACCESS_TOKEN")
-        
-        url = f"{api_url}/{phone_number_id}/messages"
-        headers = {
-            "Authorization": f"Bearer {access_token}",
-            "Content-Type": "application/json",
-        }
-
-        document_data = {}
-        if document_url:
-            document_data["link"] = document_url
-        elif document_id:
-            document_data["id"] = document_id
-        else:
-            raise ValueError("Either document_url or document_id must be provided")
-
-        if filename:
-            document_data["filename"] = filename
-        if caption:
-            document_data["caption"] = caption
-
-        data = {
-            "messaging_product": "whatsapp",
-            "to": to,
-            "type": "document",
-            "document": document_data,
-        }
-
-        try:
-            response = requests.post(url, headers=headers, json=data, timeout=10)
-            response.raise_for_status()
-            return response.json()
-        except RequestException as e:
-            logging.error(f"Failed to send document: {e}")
-            raise
+        return WhatsAppClient._send_media(
+            to, "document", document_url, document_id, filename=filename, caption=caption
+        )
 
     @staticmethod
-    def upload_media(file_path: str, media_type: str) -> str:
+    def upload_media(file_path: str, media_type: str = None) -> str:
         """
         Upload media to WhatsApp and get media ID
 
         Args:
             file_path: Path to the local file
-            media_type: MIME type (e.g., 'image/jpeg', 'video/mp4', 'audio/mpeg')
+            media_type: MIME type (e.g., 'image/jpeg', 'video/mp4', 'audio/mpeg');
+                inferred from the file extension when omitted
 
         Returns:
             Media ID that can be used in send_* methods
         """
-        api_url = _get_api_url()
-        phone_number_id = _get_config_value("PHONE_NUMBER_ID")
-        access_token = _get_config_value("ACCESS_TOKEN")
-        
-        url = f"{api_url}/{phone_number_id}/media"
-        headers = {
-            "Authorization": f"Bearer {access_token}",
-        }
+        if media_type is None:
+            media_type = mime_for_path(file_path)
+
+        settings = graph_settings()
+        url = settings["WHATSAPP_MEDIA_URL"]
+        headers = settings["WHATSAPP_AUTH_HEADERS"]
 
         try:
             with open(file_path, "rb") as file:
-                files = {
-                    "file": (os.path.basename(file_path), file, media_type),
-                    "messaging_product": (None, "whatsapp"),
-                    "type": (None, media_type),
-                }
-                response = requests.post(url, headers=headers, files=files, timeout=30)
+                if MultipartEncoder is not None:
+                    encoder = MultipartEncoder(fields={
+                        "file": (os.path.basename(file_path), file, media_type),
+                        "messaging_product": "whatsapp",
+                        "type": media_type,
+                    })
+                    response = _rate_limited_request(
+                        "POST",
+                        url,
+                        headers={**headers, "Content-Type": encoder.content_type},
+                        data=encoder,
+                        timeout=60,
+                    )
+                else:
+                    files = {
+                        "file": (os.path.basename(file_path), file, media_type),
+                        "messaging_product": (None, "whatsapp"),
+                        "type": (None, media_type),
+                    }
+                    response = _rate_limited_request("POST", url, headers=headers, files=files, timeout=30)
                 response.raise_for_status()
-                data = response.json()
+                data = _json_response(response)
                 return data.get("id")
         except RequestException as e:
-            logging.error(f"Failed to upload media: {e}")
+            logger.error("Failed to upload media: %s", e)
             raise
         except FileNotFoundError:
-            logging.error(f"File not found: {file_path}")
+            logger.error("File not found: %s", file_path)
             raise
 
     @staticmethod
@@ -297,46 +384,76 @@ class WhatsAppClient:
         Returns:
             Download URL for the media
         """
-        api_url = _get_api_url()
-        access_token = _get_config_value("ACCESS_TOKEN")
-        
-        url = f"{api_url}/{media_id}"
-        headers = {
-            "Authorization": f"Bearer {access_token}",
-        }
+        settings = graph_settings()
+        url = media_info_url(settings["WHATSAPP_GRAPH_URL"], media_id)
+        headers = settings["WHATSAPP_AUTH_HEADERS"]
 
         try:
-            response = requests.get(url, headers=headers, timeout=10)
+            response = _rate_limited_request("GET", url, headers=headers, timeout=10)
             response.raise_for_status()
-            data = response.json()
+            data = _json_response(response)
             return data.get("url")
         except RequestException as e:
-            logging.error(f"Failed to get media URL: {e}")
+            logger.error("Failed to get media URL: %s", e)
             raise
 
     @staticmethod
-    def download_media(media_url: str) -> bytes:
+    def download_media(
+        media_url: str,
+        sink: Union[BinaryIO, Callable[[bytes], Any], None] = None,
+        chunk_size: int = 1 << 16,
+    ) -> Union[bytes, int]:
         """
-        Download media content from WhatsApp
+        Stream media content from WhatsApp
 
         Args:
             media_url: The download URL obtained from get_media_url()
+            sink: Optional binary file object or callable that receives each chunk
+            chunk_size: Bytes read from the connection at a time
 
         Returns:
-            Media content as bytes
+            Media content as bytes when no sink is given, otherwise the
+            number of bytes passed to the sink
         """
-        access_token = _get_config_value("ACCESS_TOKEN")
-        
-        headers = {
-            "Authorization": f"Bearer {access_token}",
-        }
+        headers = graph_settings()["WHATSAPP_DOWNLOAD_HEADERS"]
+        if sink is None:
+            chunks = []
+            write = chunks.append
+        else:
+            write = sink if callable(sink) else sink.write
 
         try:
-            response = requests.get(media_url, headers=headers, timeout=30)
-            response.raise_for_status()
-            return response.content
+            with _rate_limited_request("GET", media_url, headers=headers, stream=True, timeout=30) as response:
+                response.raise_for_status()
+                size = 0
+                for chunk in response.iter_content(chunk_size=chunk_size):
+                    write(chunk)
+                    size += len(chunk)
         except RequestException as e:
-            logging.error(f"Failed to download media: {e}")
+            logger.error("Failed to download media: %s", e)
+            raise
+        return b"".join(chunks) if sink is None else size
+
+    @staticmethod
+    def download_media_to_file(media_url: str, dest_path: str) -> int:
+        """
+        Stream media content from WhatsApp straight to a local file
+
+        Args:
+            media_url: The download URL obtained from get_media_url()
+            dest_path: Path of the file to write; replaced if it exists
+
+        Returns:
+            Number of bytes written
+        """
+        try:
+            with open(dest_path, "wb") as file:
+                # 1 MiB chunks keep memory flat even for 16MB videos
+                return WhatsAppClient.download_media(media_url, file, chunk_size=1 << 20)
+        except Exception:
+            # Don't leave a truncated file behind
+            if os.path.exists(dest_path):
+                os.remove(dest_path)
             raise
 
     @staticmethod
@@ -350,25 +467,93 @@ class WhatsAppClient:
         Returns:
             API response dict
         """
-        api_url = _get_api_url()
-        phone_number_id = _get_config_value("PHONE_NUMBER_ID")
-        access_token = _get_config_value("ACCESS_TOKEN")
-        
-        url = f"{api_url}/{phone_number_id}/messages"
-        headers = {
-            "Authorization": f"Bearer {access_token}",
-            "Content-Type": "application/json",
-        }
-        data = {
-            "messaging_product": "whatsapp",
-            "status": "read",
-            "message_id": message_id,
-        }
+        settings = graph_settings()
+        template, send_kwargs = _read_receipt_request(
+            settings["WHATSAPP_MESSAGES_URL"], settings["WHATSAPP_HEADERS"]["Authorization"]
+        )
+        prepared = template.copy()
+        prepared.prepare_body(read_receipt_body(message_id), None)
 
         try:
-            response = requests.post(url, headers=headers, json=data, timeout=10)
+            response = _rate_limited_send(prepared, timeout=10, **send_kwargs)
             response.raise_for_status()
-            return response.json()
+            return _json_response(response)
         except RequestException as e:
-            logging.error(f"Failed to mark message as read: {e}")
-            raise
\ No newline at end of file
+            logger.error("Failed to mark message as read: %s", e)
+            raise
+
+    @staticmethod
+    def mark_as_read_async(message_id: str) -> Future:
+        """
+        Mark a message as read in the background
+
+        Args:
+            message_id: The message ID to mark as read
+
+        Returns:
+            Future for the mark_as_read response; failures are logged, so
+            callers may ignore it
+        """
+        return fire_and_forget(WhatsAppClient.mark_as_read, message_id)
+
+    @staticmethod
+    def send_bulk(
+        items: Iterable[Dict[str, Any]],
+        max_concurrency: int = 20,
+        rate_limit_mps: float = 50,
+    ) -> List[Tuple[bool, Any]]:
+        """
+        Send many messages concurrently over the pooled Graph session
+
+        Each item is a dict with "to" and "type". Text items carry "text";
+        media items carry "media_url" or "media_id" plus optional "caption"
+        and "filename", as accepted by _send_media. An item answered with
+        429 or 5xx is retried up to _BULK_MAX_ATTEMPTS times with exponential
+        backoff, waiting at least as long as the retry-after header asks.
+
+        Args:
+            items: The messages to send
+            max_concurrency: Maximum number of requests in flight; each one
+                also holds a graph_slots() slot, so the effective limit is
+                at most GRAPH_MAX_CONCURRENCY (default 32)
+            rate_limit_mps: Maximum number of requests started per second
+
+        Returns:
+            One (ok, response dict or exception) tuple per item, in item order
+        """
+        if rate_limit_mps <= 0:
+            raise ValueError("rate_limit_mps must be positive")
+        interval = 1.0 / rate_limit_mps
+        next_start = time.monotonic()
+        futures = []
+        with ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="bulk") as executor:
+            for item in items:
+                # Pace submissions so no more than rate_limit_mps requests start per second
+                delay = next_start - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+                next_start = max(next_start, time.monotonic()) + interval
+                futures.append(submit(executor, WhatsAppClient._send_bulk_item, item))
+        return [future.result() for future in futures]
+
+    @staticmethod
+    def _send_bulk_item(item: Dict[str, Any]) -> Tuple[bool, Any]:
+        try:
+            body = message_body(item)
+        except Exception as e:
+            return False, e
+
+        for attempt in range(_BULK_MAX_ATTEMPTS):
+            try:
+                return True, WhatsAppClient._post_message(body, f"send {item['type']}")
+            except RequestException as e:
+                response = e.response
+                if (
+                    response is None
+                    or response.status_code not in _BULK_RETRY_STATUSES
+                    or attempt == _BULK_MAX_ATTEMPTS - 1
+                ):
+                    return False, e
+                time.sleep(_bulk_retry_delay(response, attempt))
+            except Exception as e:
+                return False, e
@@ -0,0 +1,283 @@
+import asyncio
+import logging
+import os
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import aiohttp
+
+from .whatsapp_client import graph_settings
+from .whatsapp_payloads import (
+    media_info_url,
+    media_message_body,
+    media_upload_url,
+    message_body,
+    messages_url,
+    mime_for_path,
+    read_receipt_body,
+)
+
+logger = logging.getLogger(__name__)
+
+_JSON_HEADERS = {"Content-Type": "application/json"}
+
+
+class AsyncWhatsAppClient:
+    """
+    aiohttp-based counterpart of WhatsAppClient for callers running an event loop.
+
+    The underlying ClientSession is bound to the loop it was opened on, so use
+    one client per loop:
+
+        async with AsyncWhatsAppClient() as client:
+            await client.send_image(to, image_url=url)
+
+    Settings are resolved once on construction, from the Flask app config when
+    an app context is active and from environment variables otherwise.
+    """
+
+    def __init__(
+        self,
+        access_token: Optional[str] = None,
+        phone_number_id: Optional[str] = None,
+        api_url: Optional[str] = None,
+    ):
+        settings = graph_settings()
+        self.api_url = api_url or settings["WHATSAPP_GRAPH_URL"]
+        self.phone_number_id = phone_number_id or settings["PHONE_NUMBER_ID"]
+        self.access_token = access_token or settings["ACCESS_TOKEN"]
+        self.messages_url = messages_url(self.api_url, self.phone_number_id)
+        self._session: Optional[aiohttp.ClientSession] = None
+
+    async def __aenter__(self) -> "AsyncWhatsAppClient":
+        await self.open()
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.close()
+
+    async def open(self) -> None:
+        """Open the pooled session; calls made before this will fail."""
+        if self._session is None:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=64, limit_per_host=64, keepalive_timeout=75),
+                # Only Graph and its media CDN are called, and both need the token
+                headers={"Authorization": f"Bearer {self.access_token}"},
+                timeout=aiohttp.ClientTimeout(total=30),
+                raise_for_status=True,
+            )
+
+    async def close(self) -> None:
+        """Close the session and release its pooled connections."""
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def _post_message(self, body: bytes, what: str) -> dict:
+        try:
+            async with self._session.post(
+                self.messages_url,
+                data=body,
+                headers=_JSON_HEADERS,
+                timeout=aiohttp.ClientTimeout(total=10),
+            ) as response:
+                return await response.json()
+        except aiohttp.ClientError as e:
+            logger.error("Failed to %s: %s", what, e)
+            raise
+
+    async def send_image(self, to: str, image_url: str = None, image_id: str = None, caption: str = "") -> dict:
+        """
+        Send an image message
+
+        Args:
+            to: Recipient's phone number
+            image_url: Public URL of the image (or use image_id)
+            image_id: Media ID from WhatsApp upload (or use image_url)
+            caption: Optional caption for the image
+
+        Returns:
+            API response dict
+        """
+        body = media_message_body(to, "image", image_url, image_id, caption=caption)
+        return await self._post_message(body, "send image")
+
+    async def send_audio(self, to: str, audio_url: str = None, audio_id: str = None) -> dict:
+        """
+        Send an audio message
+
+        Args:
+            to: Recipient's phone number
+            audio_url: Public URL of the audio file (or use audio_id)
+            audio_id: Media ID from WhatsApp upload (or use audio_url)
+
+        Returns:
+            API response dict
+        """
+        body = media_message_body(to, "audio", audio_url, audio_id)
+        return await self._post_message(body, "send audio")
+
+    async def send_video(self, to: str, video_url: str = None, video_id: str = None, caption: str = "") -> dict:
+        """
+        Send a video message
+
+        Args:
+            to: Recipient's phone number
+            video_url: Public URL of the video (or use video_id)
+            video_id: Media ID from WhatsApp upload (or use video_url)
+            caption: Optional caption for the video
+
+        Returns:
+            API response dict
+        """
+        body = media_message_body(to, "video", video_url, video_id, caption=caption)
+        return await self._post_message(body, "send video")
+
+    async def send_document(
+        self,
+        to: str,
+        document_url: str = None,
+        document_id: str = None,
+        filename: str = None,
+        caption: str = "",
+    ) -> dict:
+        """
+        Send a document message
+
+        Args:
+            to: Recipient's phone number
+            document_url: Public URL of the document (or use document_id)
+            document_id: Media ID from WhatsApp upload (or use document_url)
+            filename: Optional filename for the document
+            caption: Optional caption for the document
+
+        Returns:
+            API response dict
+        """
+        body = media_message_body(
+            to, "document", document_url, document_id, filename=filename, caption=caption
+        )
+        return await self._post_message(body, "send document")
+
+    async def upload_media(self, file_path: str, media_type: str = None) -> str:
+        """
+        Upload media to WhatsApp and get media ID
+
+        Args:
+            file_path: Path to the local file
+            media_type: MIME type (e.g., 'image/jpeg', 'video/mp4', 'audio/mpeg');
+                inferred from the file extension when omitted
+
+        Returns:
+            Media ID that can be used in send_* methods
+        """
+        if media_type is None:
+            media_type = mime_for_path(file_path)
+        url = media_upload_url(self.api_url, self.phone_number_id)
+        try:
+            with open(file_path, "rb") as file:
+                form = aiohttp.FormData()
+                form.add_field("messaging_product", "whatsapp")
+                form.add_field("type", media_type)
+                form.add_field("file", file, filename=os.path.basename(file_path), content_type=media_type)
+                async with self._session.post(url, data=form) as response:
+                    data = await response.json()
+                    return data.get("id")
+        except aiohttp.ClientError as e:
+            logger.error("Failed to upload media: %s", e)
+            raise
+        except FileNotFoundError:
+            logger.error("File not found: %s", file_path)
+            raise
+
+    async def get_media_url(self, media_id: str) -> str:
+        """
+        Get the download URL for a media file
+
+        Args:
+            media_id: The media ID from the webhook
+
+        Returns:
+            Download URL for the media
+        """
+        try:
+            async with self._session.get(
+                media_info_url(self.api_url, media_id), timeout=aiohttp.ClientTimeout(total=10)
+            ) as response:
+                data = await response.json()
+                return data.get("url")
+        except aiohttp.ClientError as e:
+            logger.error("Failed to get media URL: %s", e)
+            raise
+
+    async def download_media(self, media_url: str) -> bytes:
+        """
+        Download media content from WhatsApp
+
+        Args:
+            media_url: The download URL obtained from get_media_url()
+
+        Returns:
+            Media content as bytes
+        """
+        try:
+            async with self._session.get(media_url) as response:
+                return await response.read()
+        except aiohttp.ClientError as e:
+            logger.error("Failed to download media: %s", e)
+            raise
+
+    async def mark_as_read(self, message_id: str) -> dict:
+        """
+        Mark a message as read
+
+        Args:
+            message_id: The message ID to mark as read
+
+        Returns:
+            API response dict
+        """
+        return await self._post_message(read_receipt_body(message_id), "mark message as read")
+
+    async def fetch_media_and_mark_read(self, message_id: str, media_id: str) -> Tuple[dict, bytes]:
+        """
+        Mark an inbound media message as read while its media is downloaded
+
+        Args:
+            message_id: The inbound message ID
+            media_id: The media ID carried by that message
+
+        Returns:
+            Tuple of (mark_as_read response, media content)
+        """
+
+        async def fetch() -> bytes:
+            return await self.download_media(await self.get_media_url(media_id))
+
+        read_result, content = await asyncio.gather(self.mark_as_read(message_id), fetch())
+        return read_result, content
+
+    async def send_bulk(self, items: Iterable[Dict[str, Any]], max_concurrency: int = 50) -> List[Tuple[bool, Any]]:
+        """
+        Send many messages concurrently over this client's session
+
+        Items use the same shape as WhatsAppClient.send_bulk: "to" and "type",
+        then "text" for text messages or "media_url"/"media_id" plus optional
+        "caption" and "filename" for media.
+
+        Args:
+            items: The messages to send
+            max_concurrency: Maximum number of requests in flight
+
+        Returns:
+            One (ok, response dict or exception) tuple per item, in item order
+        """
+        slots = asyncio.Semaphore(max_concurrency)
+
+        async def send(item: Dict[str, Any]) -> Tuple[bool, Any]:
+            async with slots:
+                try:
+                    return True, await self._post_message(message_body(item), f"send {item.get('type')}")
+                except Exception as e:
+                    return False, e
+
+        return list(await asyncio.gather(*(send(item) for item in items)))
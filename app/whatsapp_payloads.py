@@ -0,0 +1,137 @@
+"""Request bodies and URLs shared by WhatsAppClient and AsyncWhatsAppClient."""
+
+import json
+import os
+from functools import lru_cache
+from typing import Any, Dict, Optional
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def messages_url(graph_url: str, phone_number_id: str) -> str:
+    """URL that message sends and read receipts are posted to."""
+    return f"{graph_url}/{phone_number_id}/messages"
+
+
+def media_upload_url(graph_url: str, phone_number_id: str) -> str:
+    """URL that media files are uploaded to."""
+    return f"{graph_url}/{phone_number_id}/media"
+
+
+def media_info_url(graph_url: str, media_id: str) -> str:
+    """URL returning the download URL and metadata of an uploaded media ID."""
+    return f"{graph_url}/{media_id}"
+
+
+# File extension -> MIME type for the media formats the Cloud API accepts
+EXT_MIME = {
+    ".jpg": "image/jpeg",
+    ".jpeg": "image/jpeg",
+    ".png": "image/png",
+    ".webp": "image/webp",
+    ".mp4": "video/mp4",
+    ".3gp": "video/3gpp",
+    ".mp3": "audio/mpeg",
+    ".ogg": "audio/ogg",
+    ".aac": "audio/aac",
+    ".amr": "audio/amr",
+    ".m4a": "audio/mp4",
+    ".pdf": "application/pdf",
+    ".txt": "text/plain",
+    ".doc": "application/msword",
+    ".docx": "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+    ".xls": "application/vnd.ms-excel",
+    ".xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    ".ppt": "application/vnd.ms-powerpoint",
+    ".pptx": "application/vnd.openxmlformats-officedocument.presentationml.presentation",
+}
+
+
+def mime_for_path(file_path: str) -> str:
+    """Look up the upload MIME type from a file's extension."""
+    extension = os.path.splitext(file_path)[1].lower()
+    try:
+        return EXT_MIME[extension]
+    except KeyError:
+        raise ValueError(f"Cannot infer media type for {file_path!r}; pass media_type explicitly")
+
+
+def json_bytes(value) -> bytes:
+    """Encode one JSON value to UTF-8 bytes for splicing into a body template."""
+    if orjson is not None:
+        return orjson.dumps(value)
+    return json.dumps(value).encode()
+
+
+def media_object(
+    media_type: str, media_url: Optional[str] = None, media_id: Optional[str] = None, **extras
+) -> Dict[str, Any]:
+    """
+    The {link|id} object of a media message.
+
+    Args:
+        media_type: 'image', 'audio', 'video', 'document', ...
+        media_url: Public URL of the media (or use media_id)
+        media_id: Media ID from WhatsApp upload (or use media_url)
+        **extras: Optional fields such as caption or filename; empty values are left out
+    """
+    if media_url:
+        media_data = {"link": media_url}
+    elif media_id:
+        media_data = {"id": media_id}
+    else:
+        raise ValueError(f"Either {media_type}_url or {media_type}_id must be provided")
+    media_data.update((key, value) for key, value in extras.items() if value)
+    return media_data
+
+
+@lru_cache(maxsize=None)
+def _media_body_template(media_type: str) -> bytes:
+    # Only the recipient and the media object vary between sends, so they
+    # are the only parts that get JSON-encoded per call
+    key = json.dumps(media_type).encode()
+    return b'{"messaging_product":"whatsapp","to":%b,"type":' + key + b"," + key + b":%b}"
+
+
+def media_message_body(
+    to: str, media_type: str, media_url: Optional[str] = None, media_id: Optional[str] = None, **extras
+) -> bytes:
+    """JSON body of a media message; arguments as for media_object."""
+    media_data = media_object(media_type, media_url, media_id, **extras)
+    return _media_body_template(media_type) % (json_bytes(to), json_bytes(media_data))
+
+
+# Text send body with %b slots for the recipient and the message text
+_TEXT_BODY_TEMPLATE = b'{"messaging_product":"whatsapp","to":%b,"type":"text","text":{"body":%b}}'
+
+
+def text_message_body(to: str, text: str) -> bytes:
+    """JSON body of a text message."""
+    return _TEXT_BODY_TEMPLATE % (json_bytes(to), json_bytes(text))
+
+
+# Fixed prefix of the read receipt body; only the message ID follows it
+_READ_BODY_HEAD = b'{"messaging_product":"whatsapp","status":"read","message_id":'
+
+
+def read_receipt_body(message_id: str) -> bytes:
+    """JSON body marking message_id as read."""
+    return _READ_BODY_HEAD + json_bytes(message_id) + b"}"
+
+
+def message_body(item: Dict[str, Any]) -> bytes:
+    """
+    JSON body for one send_bulk item.
+
+    The item holds "to" and "type", then "text" for text messages or
+    "media_url"/"media_id" plus optional "caption" and "filename" for media.
+    """
+    fields = dict(item)
+    to = fields.pop("to")
+    message_type = fields.pop("type")
+    if message_type == "text":
+        return text_message_body(to, fields["text"])
+    return media_message_body(to, message_type, **fields)
@@ -15,6 +15,7 @@ Test types:
     - all: Run all tests
 """
 
+import copy
 import json
 import os
 import sys
@@ -39,6 +40,105 @@ logging.basicConfig(
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
 )
 
+# Sample webhook payload for an image message, used by test_webhook_simulation
+_IMAGE_WEBHOOK_PAYLOAD = {
+    "object": "whatsapp_business_account",
+    "entry": [{
+        "id": "ENTRY_ID",
+        "changes": [{
+            "value": {
+                "messaging_product": "whatsapp",
+                "metadata": {
+                    "display_phone_number": "15550559999",
+                    "phone_number_id": "PHONE_NUMBER_ID"
+                },
+                "contacts": [{
+                    "profile": {"name": "Test User"},
+                    "wa_id": "15551234567"
+                }],
+                "messages": [{
+                    "from": "15551234567",
+                    "id": "wamid.test123",
+                    "timestamp": "1234567890",
+                    "type": "image",
+                    "image": {
+                        "id": "media123",
+                        "mime_type": "image/jpeg",
+                        "sha256": "abc123def456",
+                        "file_size": 2048,
+                        "caption": "Test image from webhook"
+                    }
+                }]
+            },
+            "field": "messages"
+        }]
+    }]
+}
+
+# Sample webhook payloads for manual testing, built once at import
+_SAMPLE_PAYLOADS = {
+    "text_message": {
+        "object": "whatsapp_business_account",
+        "entry": [{
+            "changes": [{
+                "value": {
+                    "contacts": [{"profile": {"name": "Test User"}, "wa_id": "1234567890"}],
+                    "messages": [{
+                        "id": "msg_text_123",
+                        "type": "text",
+                        "timestamp": "1234567890",
+                        "text": {"body": "Hello, this is a test message!"}
+                    }]
+                }
+            }]
+        }]
+    },
+    "image_message": {
+        "object": "whatsapp_business_account",
+        "entry": [{
+            "changes": [{
+                "value": {
+                    "contacts": [{"profile": {"name": "Test User"}, "wa_id": "1234567890"}],
+                    "messages": [{
+                        "id": "msg_img_456",
+                        "type": "image",
+                        "timestamp": "1234567890",
+                        "image": {
+                            "id": "media_img_789",
+                            "mime_type": "image/jpeg",
+                            "sha256": "abc123def456",
+                            "file_size": 2048,
+                            "caption": "Sample image for testing"
+                        }
+                    }]
+                }
+            }]
+        }]
+    },
+    "location_message": {
+        "object": "whatsapp_business_account",
+        "entry": [{
+            "changes": [{
+                "value": {
+                    "contacts": [{"profile": {"name": "Test User"}, "wa_id": "1234567890"}],
+                    "messages": [{
+                        "id": "msg_loc_789",
+                        "type": "location",
+                        "timestamp": "1234567890",
+                        "location": {
+                            "latitude": 37.7749,
+                            "longitude": -122.4194,
+                            "name": "San Francisco",
+                            "address": "San Francisco, CA, USA"
+                        }
+                    }]
+                }
+            }]
+        }]
+    }
+}
+
+
 class MediaTester:
     """Test suite for WhatsApp media functionality."""
     
@@ -105,6 +205,11 @@ class MediaTester:
         filename = MediaHandler._generate_filename(doc_info)
         assert filename == "doc456_report.pdf"
         
+        # Test media without a MIME type falls back on the media type
+        no_mime_info = MediaHandler.extract_media_info({"type": "image", "image": {"id": "img789"}})
+        filename = MediaHandler._generate_filename(no_mime_info)
+        assert filename == "img789_image.jpg"
+        
         print("   ✓ filename generation works correctly")
     
     def test_message_content_parser(self):
@@ -143,50 +248,15 @@ class MediaTester:
     
     def test_webhook_simulation(self):
         """Test webhook payload processing"""
-        # Sample webhook payload for image message
-        webhook_payload = {
-            "object": "whatsapp_business_account",
-            "entry": [{
-                "id": "ENTRY_ID",
-                "changes": [{
-                    "value": {
-                        "messaging_product": "whatsapp",
-                        "metadata": {
-                            "display_phone_number": "15550559999",
-                            "phone_number_id": "PHONE_NUMBER_ID"
-                        },
-                        "contacts": [{
-                            "profile": {"name": "Test User"},
-                            "wa_id": "15551234567"
-                        }],
-                        "messages": [{
-                            "from": "15551234567",
-                            "id": "wamid.test123",
-                            "timestamp": "1234567890",
-                            "type": "image",
-                            "image": {
-                                "id": "media123",
-                                "mime_type": "image/jpeg",
-                                "sha256": "abc123def456",
-                                "file_size": 2048,
-                                "caption": "Test image from webhook"
-                            }
-                        }]
-                    },
-                    "field": "messages"
-                }]
-            }]
-        }
-        
         # Mock the external API calls
         with patch('app.utils.whatsapp_utils.mark_as_read'), \
              patch('app.utils.whatsapp_utils.send_text_message') as mock_send, \
              patch.object(MediaHandler, 'process_incoming_media') as mock_process:
             
-            mock_process.return_value = ("/tmp/test_image.jpg", b"fake_image_data")
+            mock_process.return_value = ("/tmp/test_image.jpg", len(b"fake_image_data"))
             
             # This would normally make API calls, but we're mocking them
-            WebhookHandler.process_whatsapp_message(webhook_payload)
+            WebhookHandler.process_whatsapp_message(_IMAGE_WEBHOOK_PAYLOAD)
             
             # Verify that send_text_message was called
             assert mock_send.called
@@ -208,6 +278,10 @@ class MediaTester:
             actual_ext = MediaHandler.MIME_TO_EXTENSION.get(mime_type)
             assert actual_ext == expected_ext, f"Expected {expected_ext} for {mime_type}, got {actual_ext}"
         
+        # MIME parameters are ignored and a missing MIME type uses the media type's default
+        assert MediaHandler._extension_for("audio/ogg; codecs=opus", "audio") == ".ogg"
+        assert MediaHandler._extension_for(None, "audio") == ".mp3"
+        
         print("   ✓ MIME type mapping is correct")
     
     def run_all_tests(self):
@@ -242,70 +316,9 @@ class MediaTester:
 
 
 def create_sample_webhook_payloads():
-    """Create sample webhook payloads for manual testing."""
-    payloads = {
-        "text_message": {
-            "object": "whatsapp_business_account",
-            "entry": [{
-                "changes": [{
-                    "value": {
-                        "contacts": [{"profile": {"name": "Test User"}, "wa_id": "1234567890"}],
-                        "messages": [{
-                            "id": "msg_text_123",
-                            "type": "text",
-                            "timestamp": "1234567890",
-                            "text": {"body": "Hello, this is a test message!"}
-                        }]
-                    }
-                }]
-            }]
-        },
-        "image_message": {
-            "object": "whatsapp_business_account",
-            "entry": [{
-                "changes": [{
-                    "value": {
-                        "contacts": [{"profile": {"name": "Test User"}, "wa_id": "1234567890"}],
-                        "messages": [{
-                            "id": "msg_img_456",
-                            "type": "image",
-                            "timestamp": "1234567890",
-                            "image": {
-                                "id": "media_img_789",
-                                "mime_type": "image/jpeg",
-                                "sha256": "abc123def456",
-                                "file_size": 2048,
-                                "caption": "Sample image for testing"
-                            }
-                        }]
-                    }
-                }]
-            }]
-        },
-        "location_message": {
-            "object": "whatsapp_business_account",
-            "entry": [{
-                "changes": [{
-                    "value": {
-                        "contacts": [{"profile": {"name": "Test User"}, "wa_id": "1234567890"}],
-                        "messages": [{
-                            "id": "msg_loc_789",
-                            "type": "location",
-                            "timestamp": "1234567890",
-                            "location": {
-                                "latitude": 37.7749,
-                                "longitude": -122.4194,
-                                "name": "San Francisco",
-                                "address": "San Francisco, CA, USA"
-                            }
-                        }]
-                    }
-                }]
-            }]
-        }
-    }
-    
-    return payloads
+    """Return a fresh copy of the sample webhook payloads for manual testing."""
+    # Callers may tweak a payload (e.g. its message id); keep the shared one intact
+    return copy.deepcopy(_SAMPLE_PAYLOADS)
 
 
 def main():